@@ -0,0 +1,38 @@
+using System;
+using System.Collections.Generic;
+using System.Text.Json;
+using Godot;
+
+namespace YumStudio.Version;
+
+/// <summary>
+/// Metadata that changes on every build (build counter and time), read at runtime from
+/// Version/build.json, which scripts/Build.py rewrites on each build. Keeping it out of
+/// YumVersion.cs means the assembly is only recompiled when the semantic version changes.
+/// </summary>
+public static class YumBuildInfo
+{
+  public const string Path = "res://Version/build.json";
+
+  private static bool loaded;
+  private static int build;
+  private static string time = "unknown time";
+
+  public static int Build { get { Load(); return build; } }
+  public static string Time { get { Load(); return time; } }
+
+  private static void Load()
+  {
+    if (loaded) return;
+    loaded = true;
+    if (!FileAccess.FileExists(Path)) return;
+
+    try
+    {
+      using var doc = JsonDocument.Parse(FileAccess.GetFileAsString(Path));
+      build = doc.RootElement.GetProperty("build").GetInt32();
+      time = doc.RootElement.GetProperty("time").GetString() ?? time;
+    }
+    catch (Exception e) when (e is JsonException or KeyNotFoundException or InvalidOperationException) { }
+  }
+}
@@ -1,4 +1,4 @@
-// Auto-generated file.
+// Auto-generated file. The build counter and time come from Version/build.json (see YumBuildInfo).
 
 namespace YumStudio.Version;
 
@@ -7,7 +7,8 @@ public static class YumStudioVersion
   public const int Major = 1;
   public const int Minor = 0;
   public const int Patch = 4;
-  public const int Build = 434;
-  public static string String => $"1.0.4+434";
-  public static string Full => $"1.0.4 (Build 434, 2025-10-31 14:24:45.791326+00:00 UTC)";
+  public const string Semantic = "1.0.4";
+  public static int Build => YumBuildInfo.Build;
+  public static string String => $"{Semantic}+{Build}";
+  public static string Full => $"{Semantic} (Build {Build}, {YumBuildInfo.Time} UTC)";
 }
@@ -1,13 +1,24 @@
 #!/usr/bin/env python3
 
-import os, sys, yaml
+import os, re, sys, yaml
 import datetime
+import glob
+import hashlib
+import json
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+try:
+    from scripts.caches import RACY_SECONDS, write_atomic, write_json
+except ImportError:
+    from caches import RACY_SECONDS, write_atomic, write_json
 
-def parse_build_file(path: str) -> dict[str, str]:
-    keys: dict[str, str] = {}
+def parse_build_file(path: str) -> list[tuple[str, str]]:
+    """`key: value` entries of path, in order; lines without ':' continue the previous value."""
+    entries: list[tuple[str, str]] = []
     
     with open(path, "r+") as file:
-        key: str = ""
         for line in file.readlines():
             if line.strip().startswith(';'): continue
             endp = line.find(':')
@@ -15,13 +26,217 @@ def parse_build_file(path: str) -> dict[str, str]:
             if endp != -1:
                 key = line[0:endp].strip()
                 val: str = line[endp+1:].strip()
-                keys[key] = val
-            else: keys[key] += line
+                entries.append((key, val))
+            elif entries:
+                key, val = entries[-1]
+                entries[-1] = (key, val + line)
         file.close()
-    return keys
+    return entries
+
+TASKS_FILE = "build/tasks.txt"
+TASK_LOGS = os.path.join(".ys-logs", "tasks")
+
+class Task:
+    """
+    A line of tasks.txt: `name: command`, optionally followed by `after: other, ...`
+    and `inputs: glob, ...` lines.
+    """
+    def __init__(self, name: str, command: str):
+        self.name = name
+        self.command = command
+        self.after: list[str] = []
+        self.inputs: list[str] = []
+        self.fingerprint: str | None = None
+        self.skipped = False
+        self.code: int | None = None
+        self.start: float = 0.0
+        self.duration: float = 0.0
+
+def parse_tasks(path: str) -> dict[str, Task]:
+    """
+    Tasks of path, in file order. `after:` and `inputs:` lines add dependencies
+    and input globs to the task above them. When no task declares any
+    dependency, each task depends on the previous one, which runs the file
+    serially as before.
+    """
+    tasks: dict[str, Task] = {}
+    task: Task | None = None
+    for key, val in parse_build_file(path):
+        if key in ("after", "inputs"):
+            if task is None: raise ValueError(f"'{key}:' must follow a task")
+            items = [item.strip() for item in val.split(',') if item.strip()]
+            if key == "after": task.after += items
+            else: task.inputs += items
+        else:
+            task = tasks[key] = Task(key, val)
+
+    if not any(task.after for task in tasks.values()):
+        names = list(tasks)
+        for prev, name in zip(names, names[1:]):
+            tasks[name].after.append(prev)
+
+    for task in tasks.values():
+        for dep in task.after:
+            if dep not in tasks: raise ValueError(f"task '{task.name}' depends on unknown task '{dep}'")
+    check_cycles(tasks)
+    return tasks
+
+def check_cycles(tasks: dict[str, Task]) -> None:
+    state: dict[str, int] = {}   # 1: visiting, 2: done
+    def visit(name: str, path: list[str]) -> None:
+        if state.get(name) == 2: return
+        if state.get(name) == 1: raise ValueError(f"tasks form a cycle: {' -> '.join(path + [name])}")
+        state[name] = 1
+        for dep in tasks[name].after: visit(dep, path + [name])
+        state[name] = 2
+    for name in tasks: visit(name, [])
+
+# Fingerprints of the tasks that declare inputs, from their last successful run:
+#   {"version": 1, "files": {path: [size, mtime_ns, sha256]}, "tasks": {name: fingerprint}}
+# A file is only hashed again when its size or mtime changed.
+BUILD_STATE = os.path.join(".ysdev", "build-state.json")
+BUILD_STATE_VERSION = 1
+def load_state(path: str = BUILD_STATE) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == BUILD_STATE_VERSION: return state
+    except (OSError, ValueError):
+        pass
+    return {"version": BUILD_STATE_VERSION, "files": {}, "tasks": {}}
+
+def save_state(state: dict, path: str = BUILD_STATE) -> None:
+    write_json(path, state)
+
+def file_hash(path: str, files: dict[str, list], racy: float) -> str | None:
+    """sha256 of path, reusing the recorded one while its size and mtime are unchanged."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    record = files.get(path)
+    if record and record[0] == st.st_size and record[1] == st.st_mtime_ns:
+        return record[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    # A file modified during this second could change again without its mtime moving.
+    files[path] = [st.st_size, st.st_mtime_ns if st.st_mtime_ns < racy else None, h.hexdigest()]
+    return h.hexdigest()
+
+def task_fingerprint(task: Task, files: dict[str, list], racy: float) -> str:
+    """Hash of a task's command and of the path and content of every file its inputs match."""
+    paths: set[str] = set()
+    for pattern in task.inputs:
+        paths.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    h = hashlib.sha256(task.command.encode())
+    for path in sorted(paths):
+        h.update(f"\0{path}\0{file_hash(path, files, racy)}".encode())
+    return h.hexdigest()
+
+def mark_up_to_date(tasks: dict[str, Task], state: dict) -> int:
+    """
+    Skip the tasks with inputs whose fingerprint matches their last successful
+    run and whose dependencies are all skipped too. Returns the number of tasks to run.
+    """
+    racy = (time.time() - RACY_SECONDS) * 1e9
+    memo: dict[str, bool] = {}
+    def dirty(task: Task) -> bool:
+        if task.name not in memo:
+            deps_dirty = [dirty(tasks[dep]) for dep in task.after]
+            if task.inputs:
+                task.fingerprint = task_fingerprint(task, state["files"], racy)
+            task.skipped = (bool(task.inputs) and not any(deps_dirty)
+                            and state["tasks"].get(task.name) == task.fingerprint)
+            if task.skipped: task.code = 0
+            memo[task.name] = not task.skipped
+        return memo[task.name]
+    return sum(dirty(task) for task in tasks.values())
+
+def record_runs(tasks: dict[str, Task], state: dict) -> None:
+    for task in tasks.values():
+        if task.skipped or task.code is None: continue
+        if task.code == 0 and task.fingerprint: state["tasks"][task.name] = task.fingerprint
+        else: state["tasks"].pop(task.name, None)
+
+print_lock = threading.Lock()
+
+def run_task(task: Task, log_dir: str) -> Task:
+    """Run a task's command, streaming its output prefixed with the task name and into its log."""
+    log_path = os.path.join(log_dir, re.sub(r"[^\w.-]", "_", task.name) + ".log")
+    with print_lock: print(f'Task: {task.name}')
+    task.start = time.monotonic()
+    with open(log_path, "w", encoding="utf-8") as log:
+        log.write(f"$ {task.command}\n")
+        log.flush()
+        proc = subprocess.Popen(task.command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        assert proc.stdout is not None
+        for raw in proc.stdout:
+            line = raw.decode("utf-8", errors="replace")
+            log.write(line)
+            with print_lock: print(f"[{task.name}] {line}", end="" if line.endswith("\n") else "\n", flush=True)
+        task.code = proc.wait()
+    task.duration = time.monotonic() - task.start
+    with print_lock:
+        if task.code == 0: print(f'Task: {task.name} done ({task.duration:.1f}s)')
+        else: print(f'Task: {task.name} failed with code {task.code}, see {log_path}')
+    return task
+
+def run_tasks(tasks: dict[str, Task], jobs: int, log_dir: str = TASK_LOGS) -> int:
+    """
+    Run every task once its dependencies succeeded, up to `jobs` at a time.
+    After a failure no new task is started; returns the first failing code.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    pending = dict(tasks)
+    running: set[Future[Task]] = set()
+    failed = 0
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            if not failed:
+                for name, task in list(pending.items()):
+                    if task.skipped:
+                        with print_lock: print(f'Task: {name} up to date')
+                        del pending[name]
+                    elif all(tasks[dep].code == 0 for dep in task.after):
+                        running.add(pool.submit(run_task, task, log_dir))
+                        del pending[name]
+            if not running: break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.result().code != 0 and not failed: failed = future.result().code or 1
+    print_summary(tasks, time.monotonic() - start)
+    return failed
+
+def print_summary(tasks: dict[str, Task], wall: float) -> None:
+    """Print the chain of finished tasks that bounded the build time."""
+    ran = [task for task in tasks.values() if task.code is not None and not task.skipped]
+    if not ran: return
+    finish: dict[str, float] = {}
+    via: dict[str, str | None] = {}
+    for task in sorted(ran, key=lambda t: t.start):
+        deps = [dep for dep in task.after if dep in finish]
+        prev = max(deps, key=lambda dep: finish[dep]) if deps else None
+        via[task.name] = prev
+        finish[task.name] = task.duration + (finish[prev] if prev else 0.0)
+
+    name: str | None = max(finish, key=lambda n: finish[n])
+    path: list[str] = []
+    while name:
+        path.append(name)
+        name = via[name]
+    busy = sum(task.duration for task in ran)
+    print(f"Critical path ({finish[path[0]]:.1f}s): " +
+          " -> ".join(f"{n} ({tasks[n].duration:.1f}s)" for n in reversed(path)))
+    skipped = sum(task.skipped for task in tasks.values())
+    print(f"{len(ran)}/{len(tasks)} task(s){f' ({skipped} up to date)' if skipped else ''} in {wall:.1f}s, {busy:.1f}s of task time "
+          f"(parallelism {busy / wall if wall > 0 else 1.0:.1f})")
 
 VERSION_FILE = "version.yml"
 CS_OUT = "Version/YumVersion.cs"
+BUILD_INFO_OUT = "Version/build.json"
 
 def read_version():
     with open(VERSION_FILE) as f:
@@ -42,9 +257,25 @@ def bump(part: str ="patch"):
     write_version(v)
     return v
 
-def generate_cs(v): # type: ignore
+def write_if_changed(path: str, content: str) -> bool:
+    """Write content to path unless it already holds it, so its mtime only moves on change."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content: return False
+    except OSError:
+        pass
+    write_atomic(path, content)
+    return True
+
+def generate_cs(v) -> bool: # type: ignore
+    """
+    Write the semantic version to YumVersion.cs, and the build counter and time to
+    build.json, which YumBuildInfo reads at runtime. The C# file only changes (and
+    forces a recompile) when the semantic version does. True when it was rewritten.
+    """
+    semantic = f"{v['major']}.{v['minor']}.{v['patch']}"
     content = f"""
-// Auto-generated file.
+// Auto-generated file. The build counter and time come from Version/build.json (see YumBuildInfo).
 
 namespace YumStudio.Version;
 
@@ -53,29 +284,70 @@ public static class YumStudioVersion
   public const int Major = {v['major']};
   public const int Minor = {v['minor']};
   public const int Patch = {v['patch']};
-  public const int Build = {v['build']};
-  public static string String => $"{v['major']}.{v['minor']}.{v['patch']}+{v['build']}";
-  public static string Full => $"{v['major']}.{v['minor']}.{v['patch']} (Build {v['build']}, {datetime.datetime.now(datetime.UTC)} UTC)";
+  public const string Semantic = "{semantic}";
+  public static int Build => YumBuildInfo.Build;
+  public static string String => $"{{Semantic}}+{{Build}}";
+  public static string Full => $"{{Semantic}} (Build {{Build}}, {{YumBuildInfo.Time}} UTC)";
 }}
 """
-    os.makedirs(os.path.dirname(CS_OUT), exist_ok=True)
-    with open(CS_OUT, "w") as f:
-        f.write(content.strip() + "\n")
-    print(f"Generated {CS_OUT}")
+    info = {"version": semantic, "build": v["build"], "time": str(datetime.datetime.now(datetime.UTC))}
+    write_if_changed(BUILD_INFO_OUT, json.dumps(info, indent=2) + "\n")
+    changed = write_if_changed(CS_OUT, content.strip() + "\n")
+    print(f"Generated {CS_OUT}" if changed else f"{CS_OUT} is up to date")
+    return changed
+
+VERSION_PARTS = ("major", "minor", "patch", "build")
+
+def parse_args(args: list[str]) -> tuple[str | None, int, bool]:
+    """
+    Version part to bump (None when not given), number of jobs (`-j N` or `-jN`)
+    and `--force` from the command line arguments (without the program name).
+    """
+    part: str | None = None
+    jobs, force = os.cpu_count() or 1, False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "-j" or arg.startswith("-j"):
+            value = args[i + 1] if arg == "-j" and i + 1 < len(args) else arg[2:].lstrip("=")
+            if not value.isdigit() or int(value) < 1: raise ValueError(f"invalid number of jobs '{value}'")
+            jobs = int(value)
+            if arg == "-j": i += 1
+        elif arg in ("-f", "--force"):
+            force = True
+        elif arg in VERSION_PARTS:
+            part = arg
+        else:
+            raise ValueError(f"unknown argument '{arg}' (expected one of {', '.join(VERSION_PARTS)}, -j N or --force)")
+        i += 1
+    return part, jobs, force
 
 def main(args: list[str] = []) -> int:
-    part = args[1] if len(args) > 1 else "build"
-    v = bump(part)
-    generate_cs(v)
+    try:
+        part, jobs, force = parse_args(args)
+        tasks = parse_tasks(TASKS_FILE)
+    except ValueError as e:
+        print(f"err: {e}")
+        return 1
+
+    state = load_state()
+    if force: state["tasks"].clear()
+    if mark_up_to_date(tasks, state) == 0 and part is None:
+        save_state(state)
+        print(f"Build is up to date ({len(tasks)} task(s))")
+        return 0
+
+    v = bump(part or "build")
+    if generate_cs(v):
+        # Tasks that read the version file must see the new one.
+        for task in tasks.values(): task.skipped, task.code = False, None
+        mark_up_to_date(tasks, state)
     print("New version:", f"{v['major']}.{v['minor']}.{v['patch']}+{v['build']}")
 
-    tasks = parse_build_file("build/tasks.txt")
-    for task in tasks.keys():
-        print(f'Task: {task}')
-        e = os.system(tasks[task])
-        if e != 0: return e
-    
-    return 0
+    code = run_tasks(tasks, jobs)
+    record_runs(tasks, state)
+    save_state(state)
+    return code
 
 if __name__ == "__main__":
-    sys.exit(main(sys.argv))
\ No newline at end of file
+    sys.exit(main(sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,33 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+# Files modified within this many seconds of a scan may change again without
+# their mtime moving, so scans do not trust their size/mtime next time.
+RACY_SECONDS = 2.0
+
+def cache_root() -> Path:
+  """
+  Root of YumStudio's on-disk caches, shared by the developer scripts:
+  $YUMSTUDIO_CACHE, else $XDG_CACHE_HOME/yumstudio, else ~/.cache/yumstudio.
+  """
+  if os.environ.get("YUMSTUDIO_CACHE"):
+    return Path(os.environ["YUMSTUDIO_CACHE"])
+  base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+  return Path(base) / "yumstudio"
+
+def write_atomic(path: str | Path, content: str) -> None:
+  """Write content through a temporary file, so readers never see a partial file."""
+  path = Path(path)
+  path.parent.mkdir(parents=True, exist_ok=True)
+  tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+  try:
+    with open(tmp, "w", encoding="utf-8") as f:
+      f.write(content)
+    os.replace(tmp, path)
+  finally:
+    tmp.unlink(missing_ok=True)
+
+def write_json(path: str | Path, data: object, indent: int | None = None) -> None:
+  write_atomic(path, json.dumps(data, indent=indent))
@@ -2,14 +2,33 @@ import requests
 import sys
 import os
 import argparse
+import hashlib
+import json
+import shutil
+import threading
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 
-from colors import Ansi
+try:
+  from scripts.colors import Ansi
+  from scripts.caches import cache_root, write_json
+except ImportError:
+  from colors import Ansi
+  from caches import cache_root, write_json
 
 owner = ""
 repo = ""
-chunk_size = 4096
+chunk_size = 64 * 1024
+max_chunk_size = 4 * 1024 * 1024
+jobs = 4
 output = "output"
 tag = None
+api_url = "https://api.github.com"
+checksums: dict[str, str] = {}
+checksum_manifests = ["sha256sums", "sha256sums.txt", "checksums.txt"]
+cache_dir: Path | None = cache_root() / "gh"
 
 strict_cmp:           bool      = False
 excluded_extensions:  list[str] = []
@@ -23,8 +42,8 @@ needed_strings:       list[str] = []
 def get_url() -> str:
   """Return API URL for latest or specific tagged release."""
   if tag:
-    return f"https://api.github.com/repos/{owner}/{repo}/releases/tags/{tag}"
-  return f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
+    return f"{api_url}/repos/{owner}/{repo}/releases/tags/{tag}"
+  return f"{api_url}/repos/{owner}/{repo}/releases/latest"
 
 def is_searched(asset_name: str) -> bool:
   part: str = asset_name if strict_cmp else asset_name.lower()
@@ -50,47 +69,308 @@ def is_searched(asset_name: str) -> bool:
   return True
 
 
-def download_asset(asset: dict[str, str]):
-  """Download a single asset with live progress updates."""
+def make_session(pool_size: int) -> requests.Session:
+  """HTTP session whose connection pool can serve every download worker at once."""
+  session = requests.Session()
+  adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+  session.mount("https://", adapter)
+  session.mount("http://", adapter)
+  return session
+
+
+def sha256_of(path: str | Path) -> str:
+  h = hashlib.sha256()
+  with open(path, "rb") as f:
+    while block := f.read(1 << 20):
+      h.update(block)
+  return h.hexdigest()
+
+def read_json(path: Path) -> dict | None:
+  try:
+    with open(path) as f:
+      return json.load(f)
+  except (OSError, ValueError):
+    return None
+
+def release_cache() -> Path | None:
+  """<cache>/<owner>/<repo>/releases/<tag or 'latest'>.json: last release metadata and its ETag."""
+  if cache_dir is None: return None
+  return cache_dir / owner / repo / "releases" / f"{tag or 'latest'}.json"
+
+def asset_cache(asset: dict) -> Path | None:
+  """<cache>/<owner>/<repo>/assets/<asset id>/: a downloaded asset and its meta.json."""
+  if cache_dir is None: return None
+  return cache_dir / owner / repo / "assets" / str(asset["id"])
+
+def fetch_release(session: requests.Session) -> dict:
+  """Fetch the release metadata, revalidating a cached copy with If-None-Match."""
+  cached_path = release_cache()
+  cached = read_json(cached_path) if cached_path else None
+  headers = {"If-None-Match": cached["etag"]} if cached and cached.get("etag") else {}
+
+  r = session.get(get_url(), headers=headers)
+  if r.status_code == 304 and cached:
+    print(f"{Ansi.BRIGHT_BLACK}Release info unchanged (cached){Ansi.RESET}")
+    write_json(cached_path, {**cached, "used": time.time()}) # type: ignore[arg-type]
+    return cached["release"]
+  if r.status_code == 404:
+    print(f"{Ansi.RED}Release not found (check tag name or repo).{Ansi.RESET}")
+    sys.exit(1)
+  r.raise_for_status()
+  release = r.json()
+  if cached_path and r.headers.get("ETag"):
+    write_json(cached_path, {"etag": r.headers["ETag"], "release": release, "used": time.time()})
+  return release
+
+def parse_checksums(text: str) -> dict[str, str]:
+  """Parse a `sha256sum`-style manifest (`<hex>  <name>` per line)."""
+  sums: dict[str, str] = {}
+  for line in text.splitlines():
+    parts = line.strip().split()
+    if len(parts) == 2 and len(parts[0]) == 64:
+      sums[parts[1].lstrip("*")] = parts[0].lower()
+  return sums
+
+def announced_digest(asset: dict) -> str | None:
+  """SHA-256 published for an asset: the API's `digest` field, else the release checksum manifest."""
+  digest = asset.get("digest") or ""
+  if digest.startswith("sha256:"):
+    return digest[len("sha256:"):]
+  return checksums.get(asset["name"])
+
+def cached_meta(asset: dict) -> dict | None:
+  cached = asset_cache(asset)
+  meta = read_json(cached / "meta.json") if cached else None
+  if not meta or meta.get("size") != asset.get("size"):
+    return None
+  announced = announced_digest(asset)
+  if announced is not None and meta.get("sha256") != announced:
+    return None # the release was re-uploaded since
+  return meta
+
+def is_up_to_date(asset: dict, path: str) -> bool:
+  """
+  The output already holds this asset: same size and the SHA-256 published for it,
+  or recorded after its last verified download. With no known digest it is fetched again.
+  """
+  if not os.path.isfile(path) or os.path.getsize(path) != asset.get("size"):
+    return False
+  meta = cached_meta(asset)
+  digest = announced_digest(asset) or (meta.get("sha256") if meta else None)
+  return digest is not None and sha256_of(path) == digest
+
+def copy_into(src: str | Path, dst: str) -> None:
+  """Atomically place a copy of src at dst (never a link: the output may be modified in place)."""
+  tmp = dst + ".tmp"
+  shutil.copyfile(src, tmp)
+  os.replace(tmp, dst)
+
+def restore_from_cache(asset: dict, path: str) -> bool:
+  cached = asset_cache(asset)
+  meta = cached_meta(asset)
+  if cached is None or meta is None or not (cached / asset["name"]).exists():
+    return False
+  copy_into(cached / asset["name"], path)
+  write_json(cached / "meta.json", {**meta, "used": time.time()})
+  return True
+
+def store_in_cache(asset: dict, path: str, digest: str) -> None:
+  cached = asset_cache(asset)
+  if cached is None: return
+  cached.mkdir(parents=True, exist_ok=True)
+  copy_into(path, str(cached / asset["name"]))
+  write_json(cached / "meta.json", {
+    "name": asset["name"], "size": os.path.getsize(path), "sha256": digest, "used": time.time()
+  })
+
+def load_checksums(session: requests.Session, assets: list[dict], name: str | None) -> None:
+  """Fill `checksums` from the release's checksum manifest, if it has one."""
+  global checksums
+  wanted = [name] if name else checksum_manifests
+  manifest = next((a for a in assets if a["name"] in wanted or a["name"].lower() in wanted), None)
+  if manifest is None:
+    if name: print(f"{Ansi.YELLOW}Checksum manifest {name} not found in this release.{Ansi.RESET}")
+    return
+  r = session.get(manifest["browser_download_url"])
+  r.raise_for_status()
+  checksums = parse_checksums(r.text)
+  print(f"Checksums: {Ansi.CYAN}{manifest['name']}{Ansi.RESET} ({len(checksums)} entries)")
+
+def prune_cache(max_age_days: float) -> None:
+  """Remove cached releases and assets not used for max_age_days."""
+  if cache_dir is None or not cache_dir.exists():
+    print(f"{Ansi.YELLOW}No release cache to prune.{Ansi.RESET}")
+    return
+  limit = time.time() - max_age_days * 86400
+  removed = 0
+  for meta_path in list(cache_dir.glob("*/*/assets/*/meta.json")):
+    meta = read_json(meta_path)
+    if meta is None or meta.get("used", 0) < limit:
+      shutil.rmtree(meta_path.parent, ignore_errors=True)
+      removed += 1
+  for release_path in list(cache_dir.glob("*/*/releases/*.json")):
+    data = read_json(release_path)
+    if data is None or data.get("used", 0) < limit:
+      release_path.unlink(missing_ok=True)
+      removed += 1
+  print(f"{Ansi.GREEN}Pruned {removed} cache entr{'y' if removed == 1 else 'ies'} older than {max_age_days:g} day(s) from {cache_dir}{Ansi.RESET}")
+
+
+class Progress:
+  """Aggregate progress of all running downloads, redrawn on a single line."""
+  def __init__(self, count: int) -> None:
+    self.count = count
+    self.done = 0
+    self.sizes: dict[str, int] = {}
+    self.received: dict[str, int] = {}
+    self.started = time.monotonic()
+    self.lock = threading.Lock()
+    self.stopped = threading.Event()
+    self.thread = threading.Thread(target=self.loop, daemon=True)
+
+  def __enter__(self) -> "Progress":
+    self.thread.start()
+    return self
+
+  def __exit__(self, *_) -> None:
+    self.stopped.set()
+    self.thread.join()
+    self.draw()
+    sys.stdout.write("\n")
+
+  def start(self, name: str, size: int, already: int) -> None:
+    with self.lock:
+      self.sizes[name] = size
+      self.received[name] = already
+
+  def advance(self, name: str, n: int) -> None:
+    with self.lock:
+      self.received[name] += n
+
+  def finish(self) -> None:
+    with self.lock:
+      self.done += 1
+
+  def loop(self) -> None:
+    while not self.stopped.wait(0.2):
+      self.draw()
+
+  def draw(self) -> None:
+    with self.lock:
+      total = sum(self.sizes.values())
+      received = sum(self.received.values())
+      done = self.done
+    rate = received / max(time.monotonic() - self.started, 1e-6)
+    percent = f" ({int(received * 100 / total)}%)" if total > 0 else ""
+    sys.stdout.write(
+      f"\r{Ansi.YELLOW}→ {done}/{self.count} files, "
+      f"{received / 2**20:.1f}/{total / 2**20:.1f} MiB{percent}, {rate / 2**20:.1f} MiB/s{Ansi.RESET}   "
+    )
+    sys.stdout.flush()
+
+
+def open_download(session: requests.Session, url: str, have: int, size: int | None) -> tuple[requests.Response, int]:
+  """
+  Streamed GET of url, resuming after the `have` bytes of a .part file when
+  possible. Returns the response and how many bytes of the .part it continues.
+  A 416 is only trusted when the .part has exactly the asset's size, and a 206
+  only when it starts at `have`: a stale or oversized .part (e.g. after a
+  re-upload under the same name) is dropped and the download starts over.
+  """
+  if have > 0:
+    r = session.get(url, stream=True, headers={"Range": f"bytes={have}-"})
+    if r.status_code == 416 and have == size:
+      return r, have
+    if r.status_code == 206 and r.headers.get("Content-Range", "").startswith(f"bytes {have}-"):
+      return r, have
+    if r.status_code not in (206, 416): # range ignored: this is the whole asset
+      return r, 0
+    r.close()
+  return session.get(url, stream=True), 0
+
+
+def download_asset(session: requests.Session, asset: dict, progress: Progress) -> tuple[str, str]:
+  """
+  Download a single asset into `<name>.part`, resuming a previous partial
+  download with an HTTP Range request. The SHA-256 is computed while
+  streaming and checked against the published digest, if any, before the
+  file is moved into place. Assets already present in the output or in the
+  release cache are not downloaded.
+  """
   url = asset["browser_download_url"]
   name = asset["name"]
   path = os.path.join(output, name)
+  part = path + ".part"
+
+  for state, reuse in (("up to date", is_up_to_date), ("from cache", restore_from_cache)):
+    if reuse(asset, path):
+      progress.start(name, 0, 0)
+      progress.finish()
+      return path, state
+
+  have = os.path.getsize(part) if os.path.exists(part) else 0
+  hasher = hashlib.sha256()
+  r, have = open_download(session, url, have, asset.get("size"))
+
+  with r:
+    if have > 0: # resuming: only the kept prefix has to be read back
+      with open(part, "rb") as f:
+        while block := f.read(1 << 20):
+          hasher.update(block)
+
+    if r.status_code == 416 and have > 0: # the .part file already holds the whole asset
+      progress.start(name, have, have)
+    else:
+      r.raise_for_status()
+      length = int(r.headers.get("Content-Length", 0))
+      progress.start(name, have + length if length > 0 else 0, have)
 
-  print(f"Downloading {Ansi.CYAN}{name}{Ansi.RESET} ...")
-
-  with requests.get(url, stream=True) as r:
-    r.raise_for_status()
-    total = int(r.headers.get("Content-Length", 0))
-    downloaded = 0
-    last_percent = -1
-
-    with open(path, "wb") as f:
-      for chunk in r.iter_content(chunk_size=chunk_size):
-        if not chunk:
-          continue
-        f.write(chunk)
-        downloaded += len(chunk)
-        if total > 0:
-          percent = int(downloaded * 100 / total)
-          if percent != last_percent:
-            sys.stdout.write(f"\r{Ansi.YELLOW}→ {percent}%{Ansi.RESET}")
-            sys.stdout.flush()
-            last_percent = percent
-              
-  print(f"\rSaved to {Ansi.GREEN}{path}{Ansi.RESET} ({Ansi.CYAN}100%{Ansi.RESET})")
-
-
-def parse_args():
+      size = chunk_size
+      with open(part, "ab" if have > 0 else "wb") as f:
+        while True:
+          begin = time.monotonic()
+          chunk = r.raw.read(size, decode_content=True)
+          if not chunk:
+            break
+          f.write(chunk)
+          hasher.update(chunk)
+          progress.advance(name, len(chunk))
+          # grow reads on fast links, shrink them when a read stalls
+          elapsed = time.monotonic() - begin
+          if elapsed < 0.05 and len(chunk) == size:
+            size = min(size * 2, max_chunk_size)
+          elif elapsed > 0.5:
+            size = max(size // 2, chunk_size)
+
+  digest = hasher.hexdigest()
+  expected = announced_digest(asset)
+  if expected is not None and digest != expected:
+    os.unlink(part)
+    raise ValueError(f"SHA-256 mismatch (expected {expected}, got {digest})")
+
+  os.replace(part, path)
+  store_in_cache(asset, path, digest)
+  progress.finish()
+  return path, "downloaded"
+
+
+def parse_args(argv: list[str]):
   parser = argparse.ArgumentParser(
     description="Download selected assets from a GitHub release (latest or specific tag)."
   )
 
-  parser.add_argument("-o", "--owner", required=True, help="GitHub repository owner.")
-  parser.add_argument("-r", "--repo", required=True, help="GitHub repository name.")
+  parser.add_argument("-o", "--owner", help="GitHub repository owner.")
+  parser.add_argument("-r", "--repo", help="GitHub repository name.")
   parser.add_argument("--tag", help="Specific release tag to download (e.g. yum-gdextension-1.0-b4.5).")
   parser.add_argument("--output", default="output", help="Output folder for downloaded assets.")
   parser.add_argument("--strict", action="store_true", help="Enable strict name comparison (case-sensitive).")
-  parser.add_argument("--chunk-size", type=int, default=4096, help="Download chunk size (bytes).")
+  parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Initial download chunk size (bytes), grown on fast connections.")
+  parser.add_argument("-j", "--jobs", type=int, default=4, help="Number of assets downloaded concurrently.")
+  parser.add_argument("--api-url", default="https://api.github.com", help="GitHub API base URL.")
+  parser.add_argument("--cache-dir", default=str(cache_root() / "gh"), help="Release metadata and asset cache.")
+  parser.add_argument("--no-cache", action="store_true", help="Neither read nor fill the release cache.")
+  parser.add_argument("--checksums", metavar="ASSET", help=f"Release asset listing SHA-256 sums (default: any of {', '.join(checksum_manifests)}).")
+  parser.add_argument("--prune-cache", type=float, metavar="DAYS", help="Remove cache entries unused for DAYS days, then exit.")
 
   parser.add_argument("--excluded-extensions", nargs="*", default=[], help="File extensions to exclude.")
   parser.add_argument("--excluded-names", nargs="*", default=[], help="Exact file names to exclude.")
@@ -99,21 +379,31 @@ def parse_args():
   parser.add_argument("--needed-names", nargs="*", default=[], help="Only include exact file names.")
   parser.add_argument("--needed-strings", nargs="*", default=[], help="Only include files containing these strings.")
 
-  return parser.parse_args()
+  return parser.parse_args(argv)
 
 
 def main(argv: list[str]):
-  global owner, repo, output, chunk_size, tag
+  global owner, repo, output, chunk_size, jobs, tag, api_url, cache_dir
   global strict_cmp, excluded_extensions, excluded_names, excluded_strings
   global needed_extensions, needed_names, needed_strings
 
-  args = parse_args()
+  args = parse_args(argv)
+  api_url = args.api_url.rstrip("/")
+  cache_dir = None if args.no_cache else Path(args.cache_dir)
+
+  if args.prune_cache is not None:
+    prune_cache(args.prune_cache)
+    return
+  if not args.owner or not args.repo:
+    print(f"{Ansi.RED}--owner and --repo are required.{Ansi.RESET}")
+    sys.exit(2)
 
   # Apply CLI args
   owner = args.owner
   repo = args.repo
   output = args.output
-  chunk_size = args.chunk_size
+  chunk_size = max(args.chunk_size, 1024)
+  jobs = max(args.jobs, 1)
   strict_cmp = args.strict
   tag = args.tag
 
@@ -127,24 +417,37 @@ def main(argv: list[str]):
   os.makedirs(output, exist_ok=True)
   print(f"{Ansi.BOLD}Fetching release info...{Ansi.RESET}")
 
-  r = requests.get(get_url())
-  if r.status_code == 404:
-    print(f"{Ansi.RED}Release not found (check tag name or repo).{Ansi.RESET}")
-    sys.exit(1)
-  r.raise_for_status()
-  release = r.json()
+  session = make_session(jobs)
+  release = fetch_release(session)
 
   print(f"Release: {Ansi.CYAN}{release['tag_name']} - {release['name']}{Ansi.RESET}")
 
   assets = release.get("assets", [])
   binaries = [a for a in assets if is_searched(a["name"])]
+  load_checksums(session, assets, args.checksums)
 
   if not binaries:
     print(f"{Ansi.RED}No candidate binaries found in this release.{Ansi.RESET}")
     return
 
-  for asset in binaries:
-    download_asset(asset)
+  print(f"Downloading {Ansi.CYAN}{len(binaries)}{Ansi.RESET} asset(s) with {min(jobs, len(binaries))} worker(s)...")
+  failed: list[tuple[str, Exception]] = []
+  saved: list[tuple[str, str]] = []
+  with Progress(len(binaries)) as progress, ThreadPoolExecutor(max_workers=jobs) as pool:
+    futures = {pool.submit(download_asset, session, asset, progress): asset["name"] for asset in binaries}
+    for future in as_completed(futures):
+      try:
+        saved.append(future.result())
+      except Exception as e:
+        failed.append((futures[future], e))
+
+  for path, state in sorted(saved):
+    print(f"Saved to {Ansi.GREEN}{path}{Ansi.RESET} ({Ansi.CYAN}{state}{Ansi.RESET})")
+  if failed:
+    for name, e in failed:
+      print(f"{Ansi.RED}Failed to download {name}: {e}{Ansi.RESET}")
+    print(f"{Ansi.RED}{len(failed)} asset(s) failed, rerun to resume the partial downloads.{Ansi.RESET}")
+    sys.exit(1)
 
   print(f"{Ansi.GREEN}All binaries downloaded successfully.{Ansi.RESET}")
 
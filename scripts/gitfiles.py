@@ -0,0 +1,48 @@
+"""
+File enumeration backed by the git index.
+
+Inside a git checkout, `git ls-files` gives the files of a directory without
+walking it, and leaves out whatever .gitignore excludes. Outside of one (or
+without git), callers fall back to their own directory walk.
+"""
+
+import subprocess
+
+def git_files(path: str, untracked: bool = False, submodules: bool = False) -> list[str] | None:
+  """
+  Files under path known to git, relative to path (with '/' separators).
+  untracked: also list untracked files that are not ignored.
+  submodules: also list the tracked files of initialized submodules
+  (git only supports this for tracked files, so it excludes `untracked`).
+  Files deleted from the work tree are left out when git can report them
+  (i.e. without `submodules`); callers should tolerate missing files anyway.
+  None when path is not inside a git work tree or git is unavailable.
+  """
+  cmd = ["git", "-C", path, "ls-files", "-z", "--cached"]
+  if submodules:
+    cmd.append("--recurse-submodules")
+  else:
+    # -t tags every entry: deleted files show up a second time as 'R', and
+    # 'S' marks entries outside of a sparse checkout.
+    cmd += ["-t", "--deleted"]
+    if untracked: cmd += ["--others", "--exclude-standard"]
+  try:
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+  except OSError:
+    return None
+  if proc.returncode != 0:
+    return None
+
+  entries = [e for e in proc.stdout.decode("utf-8", errors="surrogateescape").split("\0") if e]
+  if submodules:
+    return entries
+
+  gone = {e[2:] for e in entries if e[0] in "RS"}
+  files: list[str] = []
+  seen: set[str] = set()
+  for entry in entries:
+    name = entry[2:]
+    if entry[0] in "RS" or name in gone or name in seen: continue
+    seen.add(name)
+    files.append(name)
+  return files
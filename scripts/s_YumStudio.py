@@ -9,15 +9,21 @@ and its submodules. It performs the following steps:
 1. Deletes any existing copy of the repository.
 2. Clones the repository recursively (with submodules).
 3. For each repository (main + submodules):
-   - Creates a virtual environment (`.venv`) if it does not exist.
-   - Installs dependencies from `requirements.txt` if present,
-     otherwise installs fallback dependencies.
+   - Reuses (or creates) the cached virtual environment for its `requirements.txt`,
+     or for the fallback dependencies (see `venvs.py`).
    - Finds and executes Python scripts matching `scripts/s_*.py`.
    - If a script fails due to a missing module, automatically installs it and retries.
-   - Cleans up `.venv` and junk files after execution.
+   - Cleans up junk files after execution; the cached venv is kept for the next run.
 
 Additionally:
 - Before processing repos, executes all scripts under local `./scripts/s_*.py`.
+- Dependencies from `.ys-deps` are cloned concurrently (`-jobs=N`, default 4);
+  only the `git submodule add` registration, which edits `.gitmodules`, is serialized.
+- Repositories are processed concurrently; each script writes to `.ys-logs/<repo>/<script>.log`
+  and `.ys-logs/report.json` lists the exit code and duration of every script.
+- Resolved commits are recorded in `.ys-deps.lock`. With `-incremental`, dependencies
+  whose checkout already matches the remote branch head (or the locked commit with
+  `-locked`) are left untouched; the others are fetched into their existing clone.
 """
 
 import subprocess
@@ -28,17 +34,27 @@ import shutil
 import configparser
 import re
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 try:
   import scripts.specsV2 as specs
+  import scripts.venvs as venvs
   from scripts.colors import Ansi
+  from scripts.caches import write_atomic, write_json
 except ImportError:
   import specsV2 as specs
+  import venvs
   from colors import Ansi
+  from caches import write_atomic, write_json
 
 # Fallback dependencies if no requirements.txt exists
 DEFAULT_DEPS = ["requests"]
 CREDITS_FILE = "CREDITS.md"
+DEFAULT_JOBS = 4
+LOCK_FILE = ".ys-deps.lock"
+LOG_DIR = ".ys-logs"
+REPORT_FILE = "report.json"
 
 def run_command(cmd: str, cwd: Path | None = None) -> int:
   """Execute a shell command with verbose logging."""
@@ -50,6 +66,12 @@ def run_command(cmd: str, cwd: Path | None = None) -> int:
     print(f"{Ansi.RED}[ERR]{Ansi.RESET} Command failed: {cmd}")
     return e.returncode
 
+def run_command_captured(cmd: str, cwd: Path | None = None) -> tuple[int, str]:
+  """Execute a shell command, returning its exit code and output instead of printing it."""
+  proc = subprocess.run(cmd, shell=True, cwd=str(cwd) if cwd else None,
+                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+  return proc.returncode, proc.stdout.decode(errors="replace")
+
 def get_infos_of_git(url: str) -> tuple[str, str, str]:
   clean = url.replace(":", "/").rstrip("/")
   parts = clean.split("/")
@@ -68,39 +90,59 @@ def get_infos_of_git(url: str) -> tuple[str, str, str]:
 
   return repo_name, author, author_profile
 
-def run_python_script(python_exec: Path, script: str) -> None:
-  """Run a Python script, auto-installing missing dependencies if needed."""
-  print(f"{Ansi.GREEN}[RUN]{Ansi.RESET} Executing script: {script}")
-  result = run_command(f"{python_exec} {script}")
-
-  if result != 0:
-    print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Attempting to detect missing modules in {script}...")
-    with open(script, "r", encoding="utf-8") as f:
-      code = f.read()
-
-      missing_modules = re.findall(r"ModuleNotFoundError: No module named '([^']+)'", code)
-      if not missing_modules:
-        print(f"{Ansi.RED}[ERR]{Ansi.RESET} Script failed, no missing modules detected.")
-        sys.exit(result)
-
-      for module in missing_modules:
-        print(f"{Ansi.YELLOW}[FIX]{Ansi.RESET} Installing missing package: {module}")
-        run_command(f"{python_exec} -m pip install {module}")
-
-      print(f"{Ansi.YELLOW}[RETRY]{Ansi.RESET} Retrying script: {script}")
-      result = run_command(f"{python_exec} {script}")
-      if result != 0:
-        print(f"{Ansi.RED}[ERR]{Ansi.RESET} Script still failed after retry: {script}")
-        sys.exit(result)
-
+class ScriptResult:
+  """Outcome of one script run, as written to the JSON report."""
+  def __init__(self, repo: str, script: str, log: str) -> None:
+    self.repo = repo
+    self.script = script
+    self.log = log
+    self.code = 0
+    self.duration = 0.0
+    self.retried = False
+
+  def as_dict(self) -> dict:
+    return {"repo": self.repo, "script": self.script, "code": self.code,
+            "duration": round(self.duration, 3), "retried": self.retried, "log": self.log}
+
+def run_logged(cmd: list[str], log_path: Path) -> int:
+  """Run cmd with stdout and stderr appended to log_path."""
+  with open(log_path, "a", encoding="utf-8") as log:
+    log.write(f"$ {' '.join(cmd)}\n")
+    log.flush()
+    return subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT).returncode
+
+def run_python_script(python_exec: Path, script: str, result: ScriptResult,
+                      requirements: list[str] | None = None, req_file: Path | None = None) -> ScriptResult:
+  """
+  Run a Python script into its log. When it fails on missing modules, it is run
+  again in a cached venv made of `requirements` plus those modules, so that the
+  shared venv of `requirements` is never changed.
+  """
+  log_path = Path(result.log)
+  start = time.monotonic()
+  result.code = run_logged([str(python_exec), script], log_path)
+
+  if result.code != 0:
+    with open(log_path, "r", encoding="utf-8", errors="replace") as log:
+      missing_modules = re.findall(r"ModuleNotFoundError: No module named '([^']+)'", log.read())
+
+    if missing_modules:
+      extra = list(dict.fromkeys(module.split('.')[0] for module in missing_modules))
+      print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} {script} needs {', '.join(extra)}, retrying in a separate venv")
+      python_exec = venvs.ensure_venv(requirements or [], req_file, extra)
+      result.retried = True
+      result.code = run_logged([str(python_exec), script], log_path)
+
+  result.duration = time.monotonic() - start
+  if result.code == 0:
+    print(f"{Ansi.GREEN}[RUN]{Ansi.RESET} {script} ({result.duration:.1f}s)")
+  else:
+    print(f"{Ansi.RED}[ERR]{Ansi.RESET} {script} failed with code {result.code}"
+          f"{' after retry' if result.retried else ''}, see {log_path}")
+  return result
 
 def cleanup_repo(repo_dir: Path) -> None:
-  """Remove virtual environment and temporary files."""
-  venv_dir = repo_dir / ".venv"
-  if venv_dir.exists():
-    print(f"{Ansi.YELLOW}[CLEAN]{Ansi.RESET} Removing virtual environment in {repo_dir}")
-    shutil.rmtree(venv_dir, ignore_errors=True)
-
+  """Remove temporary files. The shared virtual environment lives in the cache and is kept."""
   for pattern in ["**/__pycache__", "**/.pytest_cache", "**/*.pyc"]:
     for path in repo_dir.glob(pattern):
       try:
@@ -113,45 +155,71 @@ def cleanup_repo(repo_dir: Path) -> None:
         print(f"{Ansi.RED}[ERR]{Ansi.RESET} Could not remove {path}: {e}")
 
 
-def process_repo(repo_dir: Path) -> None:
-  """Set up a repository: venv, dependencies, run matching scripts, and cleanup."""
+def process_repo(repo_dir: Path, log_dir: Path = Path(LOG_DIR)) -> list[ScriptResult]:
+  """
+  Set up a repository: venv, dependencies, run matching scripts (each into its own log).
+  Runs on a worker thread; cleanup and specs are left to process_repos.
+  """
   print(f"{Ansi.BOLD}{Ansi.CYAN}[PROC]{Ansi.RESET} Processing repository at {repo_dir}")
 
-  # Virtual environment
-  venv_dir = repo_dir / ".venv"
-  if venv_dir.exists():
-    print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Virtual environment already exists in {repo_dir}")
-  else:
-    print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Creating virtual environment in {repo_dir}...")
-    run_command(f"python3 -m venv {venv_dir}")
-
-  python_exec = venv_dir / "bin" / "python"
-  pip_exec = venv_dir / "bin" / "pip"
-
-  # Dependencies
+  # Dependencies: a cached virtual environment shared by every repo with the same requirements
   req_file = repo_dir / "requirements.txt"
   if req_file.exists():
-    print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Installing dependencies in {repo_dir}...")
-    run_command(f"{pip_exec} install -r {req_file}")
+    print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Using dependencies from {req_file}")
+    requirements = venvs.read_requirements(req_file)
   else:
     print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} No requirements.txt found in {repo_dir}")
     if DEFAULT_DEPS:
-      print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Installing fallback dependencies: {', '.join(DEFAULT_DEPS)}")
-      run_command(f"{pip_exec} install {' '.join(DEFAULT_DEPS)}")
+      print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Using fallback dependencies: {', '.join(DEFAULT_DEPS)}")
+    requirements, req_file = DEFAULT_DEPS, None
+  python_exec = venvs.ensure_venv(requirements, req_file)
 
-  # Script execution
+  # Script execution, in order within the repository
   pattern = str(repo_dir / "scripts" / "s_*.py")
-  scripts = glob.glob(pattern)
+  scripts = sorted(glob.glob(pattern))
+  results: list[ScriptResult] = []
 
   if not scripts:
     print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} No matching scripts found in {repo_dir}")
   else:
+    repo_logs = log_dir / str(repo_dir).strip("/").replace("/", "_")
+    repo_logs.mkdir(parents=True, exist_ok=True)
     for script in scripts:
-      run_python_script(python_exec, script)
-      
-  # Cleanup
-  cleanup_repo(repo_dir)
-  print(specs.pretty_specs(f'{repo_dir}', f'{Ansi.CYAN}[SpecsV2]: {Ansi.RESET}'))
+      log_path = repo_logs / (Path(script).stem + ".log")
+      log_path.unlink(missing_ok=True)
+      results.append(run_python_script(python_exec, script, ScriptResult(str(repo_dir), script, str(log_path)),
+                                       requirements, req_file))
+
+  return results
+
+def process_repos(repo_dirs: list[Path], jobs: int, log_dir: Path = Path(LOG_DIR)) -> int:
+  """
+  Process repositories concurrently (scripts of one repository still run in order)
+  and write a JSON report of every script run. Returns the number of failed scripts.
+  """
+  start = time.monotonic()
+  with ThreadPoolExecutor(max_workers=jobs) as pool:
+    per_repo = list(pool.map(lambda repo_dir: process_repo(repo_dir, log_dir), repo_dirs))
+  # Only once every script finished: a parent's cleanup reaches into nested dependencies,
+  # and pretty_specs animates its progress on the terminal.
+  for repo_dir in repo_dirs:
+    cleanup_repo(repo_dir)
+    print(specs.pretty_specs(f'{repo_dir}', f'{Ansi.CYAN}[SpecsV2]: {Ansi.RESET}'))
+  results = [result for repo_results in per_repo for result in repo_results]
+  failed = sum(1 for result in results if result.code != 0)
+
+  log_dir.mkdir(parents=True, exist_ok=True)
+  report = {
+    "duration": round(time.monotonic() - start, 3),
+    "jobs": jobs,
+    "failed": failed,
+    "scripts": [result.as_dict() for result in results],
+  }
+  write_json(log_dir / REPORT_FILE, report, indent=2)
+  color = Ansi.RED if failed else Ansi.GREEN
+  print(f"{color}[REPORT]{Ansi.RESET} {len(results)} script(s) in {len(repo_dirs)} repositories, "
+        f"{failed} failed, {report['duration']:.1f}s; see {log_dir / REPORT_FILE}")
+  return failed
 
 def generate_inner_doc(link: str, dir: Path, name: str, author: str) -> None:
   print(f'{Ansi.YELLOW}[DOC]{Ansi.RESET}: Generating documentation for {str(dir.absolute())}: ', end="")
@@ -223,7 +291,165 @@ def gen_docs(dcredits: list[tuple[str, str, str, str, str]]):
   gen_licenses()
   gen_credits(dcredits)
 
-def get_YumStudio(enable_const: bool = False, doc_only: bool = False):
+def clone_dependency(repo_url: str, branch: str, repo_name: str) -> tuple[int, str]:
+  """Clone one dependency (and its own submodules) into its final path."""
+  cmd = f"git clone --recurse-submodules -b {branch} {repo_url} {repo_name}"
+  ret, out = run_command_captured(cmd)
+  return ret, f"{Ansi.CYAN}[CMD]{Ansi.RESET} {cmd}\n{out}"
+
+def resolve_dependencies(deps: list[tuple[str, str, str]], jobs: int) -> list[tuple[str, str, str]]:
+  """
+  Clone every dependency concurrently on a bounded pool, then register them
+  as submodules one at a time (each `git submodule add` edits .gitmodules and
+  the index) and run a single sync/update for all of them.
+  Returns the dependencies that were resolved.
+  """
+  for _, _, repo_name in deps:
+    repo_dir = Path(repo_name)
+    if repo_dir.exists():
+      print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Removing existing repository at {repo_dir}")
+      shutil.rmtree(repo_dir)
+
+  print(f"{Ansi.CYAN}[CLONE]{Ansi.RESET} Cloning {len(deps)} repositories ({min(jobs, len(deps))} at a time)")
+  with ThreadPoolExecutor(max_workers=jobs) as pool:
+    results = list(pool.map(lambda dep: clone_dependency(*dep), deps))
+
+  resolved: list[tuple[str, str, str]] = []
+  for (repo_url, branch, repo_name), (ret, out) in zip(deps, results):
+    print(out, end="")
+    if ret != 0:
+      print(f"{Ansi.RED}[ERR]{Ansi.RESET} Could not clone {repo_url} into {repo_name}")
+      continue
+    # The path already holds the clone: git only records it in .gitmodules and the index.
+    run_command(f"git submodule add -f -b {branch} {repo_url} {repo_name}")
+    resolved.append((repo_url, branch, repo_name))
+
+  run_command("git submodule sync --recursive")
+  run_command("git submodule update --init --recursive")
+  return resolved
+
+def read_lock() -> dict[str, tuple[str, str, str]]:
+  """Read .ys-deps.lock as {path: (url, branch, commit)}."""
+  entries: dict[str, tuple[str, str, str]] = {}
+  if not os.path.exists(LOCK_FILE):
+    return entries
+  with open(LOCK_FILE, "r", encoding="utf-8") as lock:
+    for line in lock.readlines():
+      parts = line.split()
+      if len(parts) != 4 or line.startswith('#'): continue
+      repo_name, branch, commit, repo_url = parts
+      entries[repo_name] = (repo_url, branch, commit)
+  return entries
+
+def write_lock(deps: list[tuple[str, str, str]]) -> None:
+  """Record the commit currently checked out for every dependency."""
+  lines = ["# Generated by s_YumStudio.py: <path> <branch> <commit> <url>\n"]
+  for repo_url, branch, repo_name in deps:
+    commit = local_head(Path(repo_name))
+    if commit:
+      lines.append(f"{repo_name} {branch} {commit} {repo_url}\n")
+  write_atomic(LOCK_FILE, "".join(lines))
+  print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Wrote {LOCK_FILE} ({len(lines) - 1} dependencies)")
+
+def local_head(repo_dir: Path) -> str | None:
+  """Commit checked out in repo_dir, or None if it is not a clone."""
+  if not (repo_dir / ".git").exists():
+    return None
+  ret, out = run_command_captured("git rev-parse HEAD", repo_dir)
+  return out.strip() if ret == 0 else None
+
+def remote_head(repo_url: str, branch: str) -> str | None:
+  """
+  Commit at the head of `branch` on the remote, without fetching anything.
+  `branch` may also be a tag; annotated tags are peeled to the commit they point to.
+  """
+  refs = [f"refs/heads/{branch}", f"refs/tags/{branch}^{{}}", f"refs/tags/{branch}"]
+  ret, out = run_command_captured(f"git ls-remote {repo_url} " + " ".join(f"'{ref}'" for ref in refs))
+  if ret != 0:
+    return None
+  found = dict(reversed(line.split()) for line in out.splitlines() if len(line.split()) == 2)
+  return next((found[ref] for ref in refs if ref in found), None)
+
+def update_dependency(repo_url: str, branch: str, repo_name: str, commit: str) -> tuple[str, int, str]:
+  """
+  Bring one dependency to `commit`, reusing its clone (and object store) when there is one.
+  Returns (state, exit code, output) where state is 'up-to-date', 'updated' or 'cloned'.
+  """
+  repo_dir = Path(repo_name)
+  head = local_head(repo_dir)
+  if head == commit:
+    return "up-to-date", 0, f"{Ansi.GREEN}[SKIP]{Ansi.RESET} {repo_name} is up to date ({commit[:12]})\n"
+
+  if head is None:
+    if repo_dir.exists():
+      shutil.rmtree(repo_dir)
+    ret, out = clone_dependency(repo_url, branch, repo_name)
+    if ret != 0 or local_head(repo_dir) == commit:
+      return "cloned", ret, out
+    state, cmds = "cloned", []
+  else:
+    state, out = "updated", ""
+    cmds = [f"git remote set-url origin {repo_url}", f"git fetch origin {branch}"]
+
+  # A pinned commit that is no longer on the branch has to be fetched by id.
+  cmds += [f"git cat-file -e {commit}^{{commit}} || git fetch origin {commit}",
+           f"git checkout -q --detach {commit}",
+           "git submodule update --init --recursive"]
+  for cmd in cmds:
+    ret, cmd_out = run_command_captured(cmd, repo_dir)
+    out += f"{Ansi.CYAN}[CMD]{Ansi.RESET} {cmd}\n{cmd_out}"
+    if ret != 0:
+      return state, ret, out
+  return state, 0, out
+
+def resolve_dependencies_incremental(deps: list[tuple[str, str, str]], jobs: int, locked: bool) -> list[tuple[str, str, str]]:
+  """
+  Only fetch and check out the dependencies whose recorded commit moved:
+  the target is the locked commit with `locked`, otherwise the remote branch head.
+  Returns the dependencies that were cloned or updated.
+  """
+  lock = read_lock() if locked else {}
+
+  def target(dep: tuple[str, str, str]) -> str | None:
+    repo_url, branch, repo_name = dep
+    entry = lock.get(repo_name)
+    if entry and entry[0] == repo_url and entry[1] == branch:
+      return entry[2]
+    return remote_head(repo_url, branch)
+
+  def sync(dep: tuple[str, str, str]) -> tuple[str, int, str]:
+    commit = target(dep)
+    if commit is None:
+      return "failed", 1, f"{Ansi.RED}[ERR]{Ansi.RESET} Could not resolve {dep[1]} on {dep[0]}\n"
+    return update_dependency(*dep, commit)
+
+  print(f"{Ansi.CYAN}[SYNC]{Ansi.RESET} Checking {len(deps)} repositories ({min(jobs, len(deps))} at a time)")
+  with ThreadPoolExecutor(max_workers=jobs) as pool:
+    results = list(pool.map(sync, deps))
+
+  changed: list[tuple[str, str, str]] = []
+  for (repo_url, branch, repo_name), (state, ret, out) in zip(deps, results):
+    print(out, end="")
+    if ret != 0:
+      print(f"{Ansi.RED}[ERR]{Ansi.RESET} Could not update {repo_url} into {repo_name}")
+      continue
+    if state == "up-to-date":
+      continue
+    registered, _ = run_command_captured(f"git config -f .gitmodules --get submodule.{repo_name}.path")
+    if registered != 0:
+      run_command(f"git submodule add -f -b {branch} {repo_url} {repo_name}")
+    else:
+      # Record the new commit so `git submodule update` does not move it back.
+      run_command(f"git add {repo_name}")
+    changed.append((repo_url, branch, repo_name))
+
+  if changed:
+    run_command("git submodule sync --recursive")
+  print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} {len(changed)} of {len(deps)} dependencies changed")
+  return changed
+
+def get_YumStudio(enable_const: bool = False, doc_only: bool = False, jobs: int = DEFAULT_JOBS,
+                  incremental: bool = False, locked: bool = False):
   """Main entry point of the program."""
   deps: list[tuple[str, str, str]] = []
   credit_list: list[tuple[str, str, str, str, str]] = []
@@ -236,12 +462,12 @@ def get_YumStudio(enable_const: bool = False, doc_only: bool = False):
       if line.startswith('#'): continue
       elif line == '': continue
       elif line.startswith('const '):
-        if enable_const: line = line[len('const ')]
+        if enable_const: line = line[len('const '):]
         else: continue
       
       if not line.startswith('from') or not '@' in line or not ' in ' in line: 
         print(f'{Ansi.RED}err: parse error at line {linecount}:{line} in file .ys-deps{Ansi.RESET}')
-        return
+        return 1
       
       nameend = line.find('@')
       tin = line.find(' in ')
@@ -259,38 +485,44 @@ def get_YumStudio(enable_const: bool = False, doc_only: bool = False):
     gsubmds.write('')
     gsubmds.close()
 
+  if doc_only:
+    resolved = deps
+  elif incremental or locked:
+    resolved = resolve_dependencies_incremental(deps, jobs, locked)
+  else:
+    resolved = resolve_dependencies(deps, jobs)
+  if not doc_only:
+    write_lock(deps)
+
+  repo_dirs: list[Path] = []
   for repo_url, branch, repo_name in deps:
     repo_dir = Path(repo_name)
 
-    if not doc_only:
-      if repo_dir.exists():
-        print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Removing existing repository at {repo_dir}")
-        shutil.rmtree(repo_dir)
-
-      print(f"{Ansi.CYAN}[CLONE]{Ansi.RESET} Cloning repository from {repo_url}")
-      run_command(f"git submodule add -f -b {branch} {repo_url} {repo_name}")
-      run_command("git submodule sync --recursive")
-      run_command("git submodule update --init --recursive")
-      process_repo(repo_dir)
+    if not doc_only and (repo_url, branch, repo_name) in resolved:
+      repo_dirs.append(repo_dir)
 
       submodules = get_submodules(repo_dir)
       if not submodules:
-        print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} No submodules found.")
+        print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} No submodules found in {repo_dir}.")
       else:
-        print(f"{Ansi.BOLD}{Ansi.CYAN}[PROC]{Ansi.RESET} Found {len(submodules)} submodule(s).")
-        for sub in submodules:
-          print(f"{Ansi.BOLD}{Ansi.CYAN}[SUBM]{Ansi.RESET} Processing submodule: {sub}")
-          process_repo(sub)
+        print(f"{Ansi.BOLD}{Ansi.CYAN}[PROC]{Ansi.RESET} Found {len(submodules)} submodule(s) in {repo_dir}.")
+        repo_dirs.extend(submodules)
 
-      print(f"{Ansi.BOLD}{Ansi.GREEN}[DONE]{Ansi.CYAN} Dependency {repo_name} resolved{Ansi.RESET}")
-    
     credit_list.append((repo_url, str(repo_dir), *get_infos_of_git(repo_url)))
-  
-  if not doc_only:  
-    print(f"{Ansi.BOLD}{Ansi.GREEN}[DONE]{Ansi.RESET} All repositories and submodules processed successfully.")
-    print(f'{Ansi.YELLOW}[INFO]{Ansi.RESET} Updating installed packages')
-    run_command("git submodule foreach git pull")
-    print(f"{Ansi.BOLD}{Ansi.GREEN}[DONE]{Ansi.RESET} All repositories and submodules updated.")
+
+  failed = 0
+  if not doc_only:
+    failed = process_repos(repo_dirs, jobs)
+    if failed:
+      print(f"{Ansi.BOLD}{Ansi.RED}[FAIL]{Ansi.RESET} {failed} script(s) failed.")
+    else:
+      print(f"{Ansi.BOLD}{Ansi.GREEN}[DONE]{Ansi.RESET} All repositories and submodules processed successfully.")
+    venvs.evict()
+    if not (incremental or locked):
+      print(f'{Ansi.YELLOW}[INFO]{Ansi.RESET} Updating installed packages')
+      run_command("git submodule foreach git pull")
+      write_lock(deps)
+      print(f"{Ansi.BOLD}{Ansi.GREEN}[DONE]{Ansi.RESET} All repositories and submodules updated.")
 
     print(f'{Ansi.YELLOW}[INFO]{Ansi.RESET} Generating docs and licenses')
 
@@ -302,17 +534,27 @@ def get_YumStudio(enable_const: bool = False, doc_only: bool = False):
       print(f'- {repo_name} (branch {branch}) ({Ansi.CYAN}{repo_url}{Ansi.RESET})')
     
     print(f'Specs:\n{specs.pretty_specs(".", f'{Ansi.CYAN}[SpecsV2]: {Ansi.RESET}')}')
+  return 1 if failed else 0
+
+def main(argv: list[str]) -> int:
+  jobs = DEFAULT_JOBS
+  for arg in argv:
+    if arg.startswith('-jobs=') and arg[len('-jobs='):].isdigit():
+      jobs = max(1, int(arg[len('-jobs='):]))
 
-def main(argv: list[str]):
-  get_YumStudio(
+  ret = get_YumStudio(
     '-const' in argv,
-    '-doc-only' in argv
+    '-doc-only' in argv,
+    jobs,
+    '-incremental' in argv,
+    '-locked' in argv
   )
   
   try:
     import get_gh
     get_gh.main(["-o", "YumStudioHQ", "-r", "Yum-Studio", "--tag", "yum-gdextension-1.0-b4.5", "--needed-extensions", ".a "])
   except: pass
+  return ret
 
 if __name__ == "__main__":
-  main(sys.argv)
\ No newline at end of file
+  sys.exit(main(sys.argv))
\ No newline at end of file
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 import os
+import codecs
+import json
 import time, threading
+from concurrent.futures import ThreadPoolExecutor
 try:
   from scripts.colors import Ansi
+  from scripts.caches import RACY_SECONDS, cache_root, write_json
+  from scripts.gitfiles import git_files
 except ImportError:
   from colors import Ansi
+  from caches import RACY_SECONDS, cache_root, write_json
+  from gitfiles import git_files
 
 EXTENSION = {
   'C++': ['cpp', 'hpp', 'c++', 'h++'],
@@ -23,7 +30,216 @@ EXTENSION = {
 
 EXCLUDE = ['.venv', '.godot', '.vs', '.vscode', '.idea', '.mono']
 
-def specsof(path: str, pr: bool = False) -> dict[str, tuple[int, int]]:
+# Extension -> language, first match in EXTENSION order. Entries written with a
+# leading dot can never match (extensions are taken after the last dot).
+EXTENSION_TO_LANGUAGE: dict[str, str] = {}
+for _lang, _exts in EXTENSION.items():
+  for _ext in _exts:
+    EXTENSION_TO_LANGUAGE.setdefault(_ext, _lang)
+
+CHUNK_SIZE = 1024 * 1024
+BATCH_SIZE = 64
+
+def count_lines(file_path: str) -> int | None:
+  """
+  Number of lines the file has when read in text mode (UTF-8, errors ignored,
+  universal newlines: \n, \r\n and a lone \r each end a line; a last
+  unterminated line counts). ASCII chunks are counted on the raw bytes; others
+  are decoded first, since dropped bytes can join a \r and a \n.
+  None if the file cannot be read.
+  """
+  lines = 0
+  prev_cr = False
+  tail = False   # is there text after the last line break?
+  decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+  try:
+    with open(file_path, 'rb') as f:
+      while chunk := f.read(CHUNK_SIZE):
+        if chunk.isascii() and not decoder.getstate()[0]:
+          text, lf, cr = chunk, b'\n', b'\r'
+        else:
+          text, lf, cr = decoder.decode(chunk), '\n', '\r'
+        if not text: continue
+        lines += text.count(lf)
+        if prev_cr and text[:1] == lf:
+          lines -= 1
+        prev_cr = text[-1:] == cr
+        crs = text.count(cr)
+        if crs:
+          lines += crs - text.count(cr + lf)
+        last = max(text.rfind(lf), text.rfind(cr)) if crs else text.rfind(lf)
+        tail = len(text) > last + 1 if last >= 0 else True
+  except Exception:
+    return None
+  return lines + tail
+
+def count_batch(batch: list[str]) -> list[int | None]:
+  return [count_lines(file_path) for file_path in batch]
+
+# Persistent cache, shared by every scan and keyed by absolute path so that nested
+# and enclosing scans reuse each other's entries:
+#   "dirs":  {dir: {"mtime": ns, "dirs": [[name, is_link]], "files": [record]}} for walked directories,
+#   "files": {path: record} for files listed from the git index,
+#   "roots": {path: time} for the paths scanned and when they were last scanned,
+# where a record is [name, size, mtime_ns, language, lines]. Directory listings are
+# reused while the directory mtime is unchanged; files are only reopened when their
+# size or mtime changed. Entries that a scan of their parent no longer sees are
+# dropped, and so are the entries of roots not scanned for MAX_AGE_DAYS (unless
+# another root still covers them).
+SPECS_CACHE_VERSION = 4
+MAX_AGE_DAYS = 30
+_cache: dict[str, dict] | None = None
+_cache_lock = threading.Lock()
+
+def specs_cache_path() -> str:
+  return str(cache_root() / "specs" / "files.json")
+
+def load_specs_cache() -> dict[str, dict]:
+  global _cache
+  if _cache is None:
+    try:
+      with open(specs_cache_path(), "r", encoding="utf-8") as f:
+        data = json.load(f)
+      if data.get("version") == SPECS_CACHE_VERSION:
+        _cache = { "dirs": data["dirs"], "files": data["files"], "roots": data["roots"] }
+    except (OSError, ValueError, KeyError, AttributeError):
+      pass
+    if _cache is None:
+      _cache = { "dirs": {}, "files": {}, "roots": {} }
+  return _cache
+
+def under(path: str, root: str) -> bool:
+  return path == root or path.startswith(root + os.sep)
+
+def evict_roots(cache: dict[str, dict], max_age_days: float = MAX_AGE_DAYS) -> None:
+  """Drop the roots not scanned for max_age_days (e.g. deleted checkouts) and their entries."""
+  limit = time.time() - max_age_days * 86400
+  stale = [root for root, scanned in cache["roots"].items() if scanned < limit]
+  for root in stale:
+    del cache["roots"][root]
+  live = list(cache["roots"])
+  for root in stale:
+    if any(under(root, r) for r in live): continue
+    for section in (cache["dirs"], cache["files"]):
+      for k in [k for k in section if under(k, root) and not any(under(k, r) for r in live)]:
+        del section[k]
+
+def save_specs_cache() -> None:
+  if _cache is None: return
+  evict_roots(_cache)
+  try:
+    write_json(specs_cache_path(), {"version": SPECS_CACHE_VERSION, **_cache})
+  except OSError:
+    pass
+
+def drop_entries(cache: dict, prefix: str, keep: set[str] | None = None) -> int:
+  """Remove the entries of prefix and below it (except keep); returns how many were removed."""
+  gone = [k for k in cache if under(k, prefix) and (keep is None or k not in keep)]
+  for k in gone:
+    del cache[k]
+  return len(gone)
+
+def list_directory(dir_path: str, cache: dict[str, dict], racy: float, relisted: list[str]) -> dict | None:
+  """
+  Cached listing of dir_path, in the order os.walk would report it (None if unreadable).
+  When it is listed again, the cached subtrees of subdirectories that are gone are dropped.
+  """
+  try:
+    mtime = os.stat(dir_path).st_mtime_ns
+  except OSError:
+    return None
+  entry = cache.get(dir_path)
+  if entry is not None and entry["mtime"] == mtime:
+    return entry
+
+  previous = {f[0]: f for f in entry["files"]} if entry is not None else {}
+  dirs: list[list] = []
+  files: list[list] = []
+  try:
+    with os.scandir(dir_path) as it:
+      for e in it:
+        try: is_dir = e.is_dir()
+        except OSError: is_dir = False
+        if is_dir:
+          if e.name not in EXCLUDE:
+            dirs.append([e.name, e.is_symlink()])
+          continue
+        ext = e.name.rsplit('.', 1)[-1] if '.' in e.name else ''
+        lang = EXTENSION_TO_LANGUAGE.get(ext)
+        if lang is not None:
+          files.append(previous.get(e.name) or [e.name, None, None, lang, None])
+  except OSError:
+    return None
+  if entry is not None:
+    walked = {name for name, is_link in dirs if not is_link}
+    for name, is_link in entry["dirs"]:
+      if not is_link and name not in walked:
+        drop_entries(cache, os.path.join(dir_path, name))
+  # A directory modified during this second could still change without its mtime moving.
+  entry = {"mtime": mtime if mtime < racy else None, "dirs": dirs, "files": files}
+  cache[dir_path] = entry
+  relisted.append(dir_path)
+  return entry
+
+def collect_files(path: str, cache: dict[str, dict], racy: float, relisted: list[str]) -> list[tuple[str, list]]:
+  """(path, cache record) of every file with a known language, in os.walk order."""
+  found: list[tuple[str, list]] = []
+  stack = [(path, os.path.abspath(path))]
+  while stack:
+    root, abs_root = stack.pop()
+    entry = list_directory(abs_root, cache, racy, relisted)
+    if entry is None: continue
+    for record in entry["files"]:
+      found.append((os.path.join(root, record[0]), record))
+    for name, is_link in reversed(entry["dirs"]):
+      if not is_link:
+        stack.append((os.path.join(root, name), os.path.join(abs_root, name)))
+  return found
+
+def git_collect_files(path: str, cache: dict[str, list], relisted: list[str]) -> list[tuple[str, list]] | None:
+  """
+  (path, cache record) of every file with a known language tracked by git under
+  path (submodules included), or None outside of a git checkout. Records of files
+  under path that git no longer lists are dropped.
+  """
+  listed = git_files(path, submodules=True)
+  if listed is None:
+    return None
+  found: list[tuple[str, list]] = []
+  seen: set[str] = set()
+  abs_root = os.path.abspath(path)
+  for rel in listed:
+    parts = rel.split('/')
+    if any(part in EXCLUDE for part in parts[:-1]): continue
+    name = parts[-1]
+    ext = name.rsplit('.', 1)[-1] if '.' in name else ''
+    lang = EXTENSION_TO_LANGUAGE.get(ext)
+    if lang is None: continue
+    abs_path = os.path.join(abs_root, *parts)
+    record = cache.get(abs_path)
+    if record is None:
+      record = cache[abs_path] = [name, None, None, lang, None]
+    found.append((os.path.join(path, *parts), record))
+    seen.add(abs_path)
+  if drop_entries(cache, abs_root, seen):
+    relisted.append(abs_root)
+  return found
+
+def file_changed(file_path: str, record: list, racy: float) -> bool:
+  """Refresh the size/mtime of a cache record; True when its line count must be recomputed."""
+  try:
+    st = os.stat(file_path)
+  except OSError:
+    record[4] = None
+    return True
+  if record[4] is not None and record[1] == st.st_size and record[2] == st.st_mtime_ns:
+    return False
+  record[1] = st.st_size
+  # Files modified during this second are counted again next time.
+  record[2] = st.st_mtime_ns if st.st_mtime_ns < racy else None
+  return True
+
+def specsof(path: str, pr: bool = False, use_cache: bool = True, use_git: bool = True) -> dict[str, tuple[int, int]]:
   lines_and_files_per_language: dict[str, tuple[int, int]] = {}
   stop_loading = False
   
@@ -41,21 +257,38 @@ def specsof(path: str, pr: bool = False) -> dict[str, tuple[int, int]]:
     t.start()
     
   try:
-    for root, dirs, files in os.walk(path):
-      dirs[:] = [d for d in dirs if d not in EXCLUDE]
-      for file in files:
-        ext = file.rsplit('.', 1)[-1] if '.' in file else ''
-        for lang, exts in EXTENSION.items():
-          if ext in exts:
-            file_path = os.path.join(root, file)
-            try:
-              with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                line_count = sum(1 for _ in f)
-              files_count, lines_count = lines_and_files_per_language.get(lang, (0, 0))
-              lines_and_files_per_language[lang] = (files_count + 1, lines_count + line_count)
-              if pr: print(f"\rScanning: {file_path[:60]:<60}", end='', flush=True)
-            except Exception: pass
-            break
+    # List the files first: from the git index inside a checkout (tracked files
+    # only), otherwise with a walk in os.walk order. Then count the new or
+    # changed files on a thread pool.
+    racy = (time.time() - RACY_SECONDS) * 1e9
+    with _cache_lock:
+      cache = load_specs_cache() if use_cache else { "dirs": {}, "files": {}, "roots": {} }
+      # Remember the scanned root (refreshed daily) so that its entries outlive eviction.
+      abs_path = os.path.abspath(path)
+      rescanned = cache["roots"].get(abs_path, 0) < time.time() - 86400
+      if rescanned:
+        cache["roots"][abs_path] = time.time()
+      relisted: list[str] = []
+      found = git_collect_files(path, cache["files"], relisted) if use_git else None
+      if found is None:
+        found = collect_files(path, cache["dirs"], racy, relisted)
+      stale = [(file_path, record) for file_path, record in found if file_changed(file_path, record, racy)]
+
+      batches = [[file_path for file_path, _ in stale[i:i + BATCH_SIZE]] for i in range(0, len(stale), BATCH_SIZE)]
+      counts: list[int | None] = []
+      with ThreadPoolExecutor() as pool:
+        for batch, batch_counts in zip(batches, pool.map(count_batch, batches)):
+          counts.extend(batch_counts)
+          if pr: print(f"\rScanning: {batch[-1][:60]:<60}", end='', flush=True)
+      for (_, record), line_count in zip(stale, counts):
+        record[4] = line_count
+
+      for _, (_, _, _, lang, line_count) in found:
+        if line_count is None: continue
+        files_count, lines_count = lines_and_files_per_language.get(lang, (0, 0))
+        lines_and_files_per_language[lang] = (files_count + 1, lines_count + line_count)
+      if use_cache and (stale or relisted or rescanned):
+        save_specs_cache()
   finally:
     if pr:
       stop_loading = True
@@ -0,0 +1,191 @@
+"""
+Shared virtual environments for the repository scripts.
+
+A venv is keyed by the hash of its requirement set (and the interpreter that
+creates it), lives under <cache>/venvs/<key> and is reused across repositories
+and runs. Built wheels are kept in <cache>/wheels so that a new requirement set
+made of already seen packages installs without touching the network.
+"""
+
+import fcntl
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+  from scripts.colors import Ansi
+  from scripts.caches import cache_root
+except ImportError:
+  from colors import Ansi
+  from caches import cache_root
+
+PYTHON = "python3"
+MAX_AGE_DAYS = 30
+MAX_VENVS_SIZE = 2 * 1024 ** 3
+MAX_WHEELS_SIZE = 1024 ** 3
+READY_MARKER = ".ys-ready"
+
+def venvs_dir() -> Path:
+  return cache_root() / "venvs"
+
+def wheels_dir() -> Path:
+  return cache_root() / "wheels"
+
+def read_requirements(req_file: Path) -> list[str]:
+  """Requirement lines of req_file, without comments and blank lines."""
+  lines: list[str] = []
+  with open(req_file, "r", encoding="utf-8") as f:
+    for line in f.readlines():
+      line = line.split('#', 1)[0].strip()
+      if line: lines.append(line)
+  return lines
+
+LOCAL_PREFIXES = ("-r", "--requirement", "-c", "--constraint", "-e", "--editable", ".", "/", "~")
+INCLUDE_PREFIXES = ("--requirement", "--constraint", "-r", "-c")
+
+def is_local(requirement: str) -> bool:
+  """Whether a requirement line refers to a path, and so means something else in another directory."""
+  return requirement.startswith(LOCAL_PREFIXES) or "file:" in requirement
+
+def included_file(requirement: str, base: Path) -> Path | None:
+  """File named by a `-r`/`-c` line, relative to base."""
+  for prefix in INCLUDE_PREFIXES:
+    if requirement.startswith(prefix):
+      name = requirement[len(prefix):].lstrip(" =")
+      return base / name if name else None
+  return None
+
+def requirements_key(requirements: list[str], base: Path | None = None) -> str:
+  """
+  Cache key of a requirement set: order and duplicates do not matter.
+  When it has local lines (`-r base.txt`, `-e .`, `./pkg`...), they are resolved
+  against base, so base and the content of the files they include are part of the key.
+  """
+  python = os.path.realpath(shutil.which(PYTHON) or PYTHON)
+  h = hashlib.sha256(python.encode())
+  for req in sorted(set(requirements)):
+    h.update(b"\0" + req.encode())
+  local = [req for req in requirements if is_local(req)]
+  if local and base is not None:
+    h.update(b"\0dir\0" + str(base.resolve()).encode())
+    for req in sorted(set(local)):
+      included = included_file(req, base)
+      if included is not None and included.is_file():
+        h.update(b"\0" + included.read_bytes())
+  return h.hexdigest()[:24]
+
+def run_quiet(cmd: list[str]) -> int:
+  print(f"{Ansi.CYAN}[CMD]{Ansi.RESET} {' '.join(cmd)}")
+  return subprocess.run(cmd).returncode
+
+def install(python_exec: Path, requirements: list[str]) -> int:
+  """
+  Install requirements (pip arguments) from the wheel store when possible;
+  otherwise build the missing wheels into the store first, and fall back to a
+  plain install.
+  """
+  wheels = wheels_dir()
+  wheels.mkdir(parents=True, exist_ok=True)
+  pip = [str(python_exec), "-m", "pip", "install", "--disable-pip-version-check", "-q"]
+  offline = pip + ["--no-index", "--find-links", str(wheels), *requirements]
+  if run_quiet(offline) == 0:
+    return 0
+  run_quiet([str(python_exec), "-m", "pip", "wheel", "--disable-pip-version-check", "-q",
+             "--find-links", str(wheels), "-w", str(wheels), *requirements])
+  if run_quiet(offline) == 0:
+    return 0
+  return run_quiet(pip + ["--find-links", str(wheels), *requirements])
+
+def ensure_venv(requirements: list[str], req_file: Path | None = None, extra: list[str] | None = None) -> Path:
+  """
+  Python executable of the cached venv for `requirements`, creating it on first use.
+  When they come from req_file, pip is given the file so that its options and
+  relative paths keep working. `extra` packages are installed on top, and are part
+  of the key like the requirements.
+  Creation is serialized per key with a file lock, so concurrent runs share one venv.
+  """
+  extra = extra or []
+  key = requirements_key(requirements + extra, req_file.parent if req_file else None)
+  venv_dir = venvs_dir() / key
+  python_exec = venv_dir / "bin" / "python"
+  marker = venv_dir / READY_MARKER
+  venvs_dir().mkdir(parents=True, exist_ok=True)
+
+  with open(venvs_dir() / f"{key}.lock", "w") as lock:
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    if marker.exists():
+      print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Reusing cached virtual environment {venv_dir}")
+      os.utime(marker)
+      return python_exec
+
+    # A venv without the marker was interrupted while being built.
+    shutil.rmtree(venv_dir, ignore_errors=True)
+    print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Creating cached virtual environment {venv_dir}...")
+    if run_quiet([PYTHON, "-m", "venv", str(venv_dir)]) != 0:
+      print(f"{Ansi.RED}[ERR]{Ansi.RESET} Could not create {venv_dir}")
+      return python_exec
+    args = (["-r", str(req_file)] if req_file else requirements) + extra
+    if args and install(python_exec, args) != 0:
+      print(f"{Ansi.RED}[ERR]{Ansi.RESET} Could not install {', '.join(requirements + extra)}")
+      return python_exec
+    marker.touch()
+  return python_exec
+
+def dir_size(path: Path) -> int:
+  total = 0
+  for root, _, files in os.walk(path):
+    for name in files:
+      try: total += os.lstat(os.path.join(root, name)).st_size
+      except OSError: pass
+  return total
+
+def remove_venv(venv_dir: Path) -> bool:
+  """Delete a venv unless another run holds its lock (it is being built or reused); True if deleted."""
+  with open(venvs_dir() / f"{venv_dir.name}.lock", "w") as lock:
+    try:
+      fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+      return False
+    shutil.rmtree(venv_dir, ignore_errors=True)
+  return True
+
+def evict(max_age_days: float = MAX_AGE_DAYS, max_venvs_size: int = MAX_VENVS_SIZE,
+          max_wheels_size: int = MAX_WHEELS_SIZE) -> None:
+  """Drop venvs and wheels unused for max_age_days, then the least recently used ones over budget."""
+  limit = time.time() - max_age_days * 86400
+
+  venvs: list[tuple[float, int, Path]] = []
+  if venvs_dir().exists():
+    for venv_dir in venvs_dir().iterdir():
+      if not venv_dir.is_dir(): continue
+      marker = venv_dir / READY_MARKER
+      used = (marker if marker.exists() else venv_dir).stat().st_mtime
+      venvs.append((used, dir_size(venv_dir), venv_dir))
+
+  wheels: list[tuple[float, int, Path]] = []
+  if wheels_dir().exists():
+    for wheel in wheels_dir().iterdir():
+      st = wheel.stat()
+      wheels.append((max(st.st_atime, st.st_mtime), st.st_size, wheel))
+
+  removed = 0
+  for entries, budget in ((venvs, max_venvs_size), (wheels, max_wheels_size)):
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for used, size, path in entries:
+      if used >= limit and total <= budget: break
+      if path.is_dir():
+        if not remove_venv(path): continue
+      else: path.unlink(missing_ok=True)
+      total -= size
+      removed += 1
+  if removed:
+    print(f"{Ansi.YELLOW}[CLEAN]{Ansi.RESET} Evicted {removed} cached venv(s)/wheel(s) from {cache_root()}")
+
+if __name__ == "__main__":
+  days = float(sys.argv[1]) if len(sys.argv) > 1 else MAX_AGE_DAYS
+  evict(days)
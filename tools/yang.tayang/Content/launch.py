@@ -1,105 +1,910 @@
 #!/usr/bin/env python3
 
+import fnmatch
+import glob
+import hashlib
+import json
 import random
+import shlex
+import shutil
+import subprocess
 import sys
 import os
+import threading
+import time
 import urllib.request
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Callable
+
+try:
+  # Shared with specsV2 when yang runs from a YumStudio checkout; yang walks the tree otherwise.
+  from scripts.gitfiles import git_files
+except ImportError:
+  git_files = None
+
+try:
+  from scripts.caches import RACY_SECONDS, write_json
+except ImportError:
+  # yang also runs standalone, outside of a YumStudio checkout.
+  RACY_SECONDS = 2.0
+
+  def write_json(path: str | Path, data: object, indent: int | None = None) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    with open(tmp, 'w') as f:
+      json.dump(data, f, indent=indent)
+    os.replace(tmp, path)
 
 TT_EXCLUDE  = 'exclude:'
 TT_INCLUDE  = 'include:'
 TT_DOWNLOAD = 'download:'
 TT_CHECK    = 'check:'
 TT_CMD      = 'cmd:'
+TT_RULE     = 'rule:'
+
+YANG_DIR    = '.yang'
+BUILD_DB    = 'build.db.json'
+LISTING_DB  = 'listing.json'
+TRACE_FILE  = 'trace.json'
+
+class BuildOptions:
+  """Command line switches (`--name`, `-j N`) given to yang, as opposed to `key:value` definitions."""
+  def __init__(self) -> None:
+    self.force: bool = False
+    self.jobs: int = os.cpu_count() or 1
+    self.walk_cache: bool = False
+    self.git: bool = True
+    self.profile: bool = False
+    self.profile_top: int = 10
+    self.trace: str | None = None
+    self.profiler: Profiler = Profiler()
+    self.cache_dir: str | None = None
+    self.cache_size: int = 1 << 30
+    self.cache: ArtifactCache | None = None
+    self.batch_size: int = 256
+    self.batch_length: int = 100_000
+
+  def apply(self, flag: str, value: str | None) -> int:
+    """Apply one switch, returns how many arguments it consumed (0 if unknown)."""
+    if flag == '--force':
+      self.force = True
+      return 1
+    if flag == '--walk-cache':
+      self.walk_cache = True
+      return 1
+    if flag == '--no-git':
+      self.git = False
+      return 1
+    if flag == '--profile':
+      self.profile = True
+      return 1
+    if flag == '--trace' and value is not None:
+      self.profile = True
+      self.trace = value
+      return 2
+    if flag == '--profile-top' and value is not None and value.isdigit():
+      self.profile_top = int(value)
+      return 2
+    if flag == '--cache' and value is not None:
+      self.cache_dir = value
+      return 2
+    if flag == '--cache-size' and value is not None and parse_size(value) is not None:
+      self.cache_size = parse_size(value) # type: ignore[assignment]
+      return 2
+    if flag == '--batch-size' and value is not None and value.isdigit():
+      self.batch_size = max(1, int(value))
+      return 2
+    if flag == '--batch-length' and value is not None and value.isdigit():
+      self.batch_length = int(value)
+      return 2
+    if flag in ('-j', '--jobs') and value is not None and value.isdigit():
+      self.jobs = max(1, int(value))
+      return 2
+    if flag.startswith('-j') and flag[2:].isdigit():
+      self.jobs = max(1, int(flag[2:]))
+      return 1
+    return 0
+
+def run_captured(cmd: str) -> tuple[int, str]:
+  """Run a shell command, returning its exit code and combined stdout/stderr."""
+  proc = subprocess.run(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+  return proc.returncode, proc.stdout.decode(errors='replace')
+
+class Profiler:
+  """
+  Start, duration and exit code of every command yang runs (cmd:, per-file
+  compiles, rules, check:), written as Chrome trace events with `--profile`.
+  """
+  def __init__(self) -> None:
+    self.origin: float = time.perf_counter()
+    self.events: list[dict[str, str | int | float | dict[str, int]]] = []
+    self.threads: dict[int, int] = {}
+    self.lock: threading.Lock = threading.Lock()
+
+  def shell(self, kind: str, name: str, cmd: str, capture: bool = False) -> tuple[int, str]:
+    """Run cmd through the shell and record it. Output is only returned when captured."""
+    start = time.perf_counter()
+    if capture:
+      ret, output = run_captured(cmd)
+    else:
+      ret, output = subprocess.run(cmd, shell=True).returncode, ''
+    end = time.perf_counter()
+    with self.lock:
+      tid = self.threads.setdefault(threading.get_ident(), len(self.threads))
+      self.events.append({
+        'name': name, 'cat': kind, 'ph': 'X', 'pid': 1, 'tid': tid,
+        'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6, 'args': { 'code': ret }
+      })
+    return ret, output
+
+  def write_trace(self, path: Path) -> None:
+    """Write a trace loadable in chrome://tracing or Perfetto."""
+    names = [{ 'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': { 'name': f'thread {tid}' } }
+             for tid in self.threads.values()]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+      json.dump({ 'traceEvents': names + self.events, 'displayTimeUnit': 'ms' }, f)
+
+  def summary(self, top: int) -> str:
+    wall = time.perf_counter() - self.origin
+    busy = sum(float(e['dur']) for e in self.events) / 1e6 # type: ignore[arg-type]
+    s = f'* profile: {len(self.events)} step(s), {wall:.3f}s wall, {busy:.3f}s busy (parallelism {busy / wall if wall else 0:.2f})\n'
+    per_kind: dict[str, float] = {}
+    for e in self.events:
+      per_kind[str(e['cat'])] = per_kind.get(str(e['cat']), 0) + float(e['dur']) / 1e6 # type: ignore[arg-type]
+    for kind, total in sorted(per_kind.items(), key=lambda kv: kv[1], reverse=True):
+      s += f'*   {kind:<8} {total:>9.3f}s\n'
+    slowest = sorted(self.events, key=lambda e: float(e['dur']), reverse=True)[:top] # type: ignore[arg-type]
+    if slowest: s += f'* slowest {len(slowest)}:\n'
+    for e in slowest:
+      s += f'*   {float(e["dur"]) / 1e6:>9.3f}s  {e["cat"]:<8} {e["name"]} (code {e["args"]["code"]})\n' # type: ignore[index, arg-type]
+    return s.rstrip('\n')
+
+def parse_size(s: str) -> int | None:
+  """Parse a byte count with an optional K, M or G suffix."""
+  units = { 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30 }
+  s = s.strip().upper().removesuffix('B')
+  scale = units.get(s[-1:], 1)
+  digits = s[:-1] if s[-1:] in units else s
+  return int(digits) * scale if digits.isdigit() else None
+
+def file_digest(path: str) -> str:
+  """SHA-256 of a file's content, read in 1 MiB blocks."""
+  h = hashlib.sha256()
+  with open(path, 'rb') as f:
+    while block := f.read(1 << 20):
+      h.update(block)
+  return h.hexdigest()
+
+def config_digest(config: dict[str, str]) -> str:
+  return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+# (content hash, size, mtime_ns or None when too recent to be trusted) of a file
+Stamp = tuple[str, int, int | None]
+# A file a job builds: (file, command it would be built with alone, stamp before the job)
+Built = tuple[str, str, Stamp]
+# A compile job: (name, command, files it builds)
+Job = tuple[str, str, list[Built]]
+
+class BuildDB:
+  """
+  On-disk record of the last successful compilation of every file:
+  content hash (with size/mtime to avoid rehashing untouched files),
+  expanded command and a digest of the configuration it ran under.
+  Rules are recorded the same way, with the hashes of all their inputs.
+  """
+  def __init__(self, path: Path, force: bool = False) -> None:
+    self.path: Path = path
+    self.force: bool = force
+    self.files: dict[str, dict[str, str | int]] = {}
+    self.rules: dict[str, dict[str, str | dict[str, dict[str, str | int]]]] = {}
+    self.changed: bool = False
+
+    if path.exists():
+      try:
+        with open(path, 'r') as f:
+          data = json.load(f)
+          self.files = data.get('files', {})
+          self.rules = data.get('rules', {})
+      except (OSError, ValueError) as e:
+        print(f'* ignoring unreadable build database {path}: {e}')
+
+  def digest(self, file: str, entry: dict[str, str | int] | None = None) -> Stamp:
+    """
+    (hash, size, mtime) of file, reusing the recorded hash while size and mtime
+    are unchanged. A file modified within RACY_SECONDS could change again without
+    its mtime moving: its mtime is returned as None, so it is never trusted later.
+    """
+    st = os.stat(file)
+    entry = entry or self.files.get(file)
+    mtime = st.st_mtime_ns if st.st_mtime_ns < (time.time() - RACY_SECONDS) * 1e9 else None
+    if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns:
+      return str(entry['hash']), st.st_size, mtime
+    return file_digest(file), st.st_size, mtime
+
+  def up_to_date(self, file: str, cmd: str, config: str, stamp: Stamp) -> bool:
+    if self.force: return False
+    entry = self.files.get(file)
+    if not entry or entry['cmd'] != cmd or entry['config'] != config:
+      return False
+    return stamp[0] == entry['hash']
+
+  def record(self, file: str, cmd: str, config: str, stamp: Stamp) -> None:
+    """Record file as built by cmd, with the stamp taken before cmd started."""
+    digest, size, mtime = stamp
+    self.files[file] = { 'hash': digest, 'size': size, 'mtime': mtime, 'cmd': cmd, 'config': config } # type: ignore[dict-item]
+    self.changed = True
+
+  def input_digests(self, rule: 'Rule') -> dict[str, dict[str, str | int]]:
+    known = self.rules.get(rule.name, {}).get('inputs', {})
+    digests: dict[str, dict[str, str | int]] = {}
+    for file in rule.inputs:
+      digest, size, mtime = self.digest(file, known.get(file)) # type: ignore[arg-type]
+      digests[file] = { 'hash': digest, 'size': size, 'mtime': mtime }
+    return digests
+
+  def rule_changed(self, rule: 'Rule', inputs: dict[str, dict[str, str | int]]) -> bool:
+    entry = self.rules.get(rule.name)
+    if not entry or entry['cmd'] != rule.command:
+      return True
+    known = entry['inputs']
+    return known.keys() != inputs.keys() or any(known[f]['hash'] != d['hash'] for f, d in inputs.items()) # type: ignore[index]
+
+  def record_rule(self, rule: 'Rule', inputs: dict[str, dict[str, str | int]]) -> None:
+    self.rules[rule.name] = { 'cmd': rule.command, 'inputs': inputs }
+    self.changed = True
+
+  def save(self) -> None:
+    if not self.changed: return
+    write_json(self.path, { 'files': self.files, 'rules': self.rules })
+    self.changed = False
+
+class ArtifactCache:
+  """
+  Content-addressed store of compiler outputs (`--cache DIR`). An output is
+  keyed by the hash of its input file's content and of the fully expanded
+  command, so switching back to a previously built revision restores outputs
+  instead of recompiling them. The least recently used objects are evicted
+  once the store grows past its size cap.
+  """
+  def __init__(self, root: Path, max_size: int) -> None:
+    self.root: Path = root
+    self.max_size: int = max_size
+    self.index_path: Path = root / 'index.json'
+    self.index: dict[str, dict[str, int | float]] = {}
+    self.hits: int = 0
+    self.changed: bool = False
+
+    if self.index_path.exists():
+      try:
+        with open(self.index_path, 'r') as f:
+          self.index = json.load(f)
+      except (OSError, ValueError) as e:
+        print(f'* ignoring unreadable cache index {self.index_path}: {e}')
 
-def download_file(url: str, path: str) -> int:
-  """Download a file from url into path."""
+  @staticmethod
+  def key(cmd: str, input_digest: str) -> str:
+    return hashlib.sha256(f'{input_digest}\0{cmd}'.encode()).hexdigest()
+
+  def object(self, key: str) -> Path:
+    return self.root / 'objects' / key[:2] / key
+
+  def restore(self, key: str, output: str) -> bool:
+    obj = self.object(key)
+    if key not in self.index or not obj.exists():
+      return False
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f'{output}.yang-tmp'
+    shutil.copyfile(obj, tmp)
+    os.replace(tmp, output)
+    self.index[key]['used'] = time.time()
+    self.hits += 1
+    self.changed = True
+    return True
+
+  def store(self, key: str, output: str) -> None:
+    if not os.path.isfile(output):
+      print(f'* cache: expected output {output} was not produced')
+      return
+    obj = self.object(key)
+    obj.parent.mkdir(parents=True, exist_ok=True)
+    tmp = obj.with_suffix('.tmp')
+    shutil.copyfile(output, tmp)
+    os.replace(tmp, obj)
+    self.index[key] = { 'size': obj.stat().st_size, 'used': time.time() }
+    self.changed = True
+
+  def evict(self) -> None:
+    total = sum(int(e['size']) for e in self.index.values())
+    for key, entry in sorted(self.index.items(), key=lambda kv: kv[1]['used']):
+      if total <= self.max_size: break
+      self.object(key).unlink(missing_ok=True)
+      total -= int(entry['size'])
+      del self.index[key]
+      self.changed = True
+
+  def save(self) -> None:
+    self.evict()
+    if not self.changed: return
+    write_json(self.index_path, self.index)
+    self.changed = False
+
+def download_file(url: str, path: str, sha256: str | None = None) -> int:
+  """
+  Download a file from url into path. The SHA-256 is computed while streaming
+  and, when sha256 is given, must match before the file is moved into place;
+  an existing file is only kept if it matches too.
+  """
   dest = Path(path)
   dest.parent.mkdir(parents=True, exist_ok=True)
   if dest.exists():
-    print(f'* skipping download: {path} already exists')
-    return 0
+    if sha256 is None:
+      print(f'* skipping download: {path} already exists')
+      return 0
+    if file_digest(path) == sha256:
+      print(f'* skipping download: {path} already exists (sha256 ok)')
+      return 0
+    print(f'* {path} does not match its sha256, downloading it again')
+
   print(f'* downloading {url} -> {path}...')
+  part = dest.with_name(dest.name + '.part')
   try:
-    urllib.request.urlretrieve(url, str(dest))
+    h = hashlib.sha256()
+    with urllib.request.urlopen(url) as r, open(part, 'wb') as f:
+      while block := r.read(1 << 20):
+        f.write(block)
+        h.update(block)
+    if sha256 is not None and h.hexdigest() != sha256:
+      part.unlink()
+      print(f'! download failed: sha256 mismatch for {url} (expected {sha256}, got {h.hexdigest()})')
+      return 1
+    os.replace(part, dest)
     print(f'* downloaded {url}')
     return 0
   except Exception as e:
+    part.unlink(missing_ok=True)
     print(f'! download failed: {e}')
     return 1
 
+BUILTIN_RANDOM = 'builtins.random'
+FILE_VARS      = ('file', 'filename', 'stem')
+BATCH_VAR      = 'files'
+RULE_VARS      = ('inputs', 'outputs')
+
+class ExpansionError(Exception): pass
+
+class Var:
+  """Reference to a variable left unresolved in a Template ($builtins.random and per-file/per-rule variables)."""
+  __slots__ = ('name',)
+  def __init__(self, name: str) -> None: self.name: str = name
+
+class Template:
+  """Literal text and unresolved variable references, rendered in a single pass."""
+  def __init__(self, parts: list[str | Var]) -> None:
+    self.parts: list[str | Var] = parts
+    self.random: bool = any(isinstance(p, Var) and p.name == BUILTIN_RANDOM for p in parts)
+
+  def render(self, values: dict[str, str] | None = None) -> str:
+    values = values or {}
+    if self.random:
+      values = { **values, BUILTIN_RANDOM: ''.join(random.choices('AZERTYUIOPQSDFGHJKLMWXCVBNazertyuiopqsdfghjklmwxcvbn', k=16)) }
+    return ''.join(p if isinstance(p, str) else values[p.name] for p in self.parts)
+
+class Expander:
+  """
+  The configuration compiled for expansion: every variable is tokenized and
+  resolved at most once (self-referencing variables are reported), so that
+  rendering a command is a single join. `$name` refers to the longest
+  defined variable name at that position; undefined references are kept.
+  """
+  def __init__(self, config: dict[str, str]) -> None:
+    self.config: dict[str, str] = config
+    self.values: dict[str, str] = { **config, 'root': str(Path(__file__).parent) }
+    self.names: set[str] = set(self.values) | { BUILTIN_RANDOM }
+    self.resolved: dict[str, list[str | Var]] = {}
+    self.resolving: list[str] = []
+
+  def tokenize(self, s: str, names: set[str]) -> list[str | Var]:
+    if '$' not in s: return [s] if s else []
+    lengths = sorted({ len(n) for n in names }, reverse=True)
+    parts: list[str | Var] = []
+    start = 0
+    i = s.find('$')
+    while i != -1:
+      name = next((s[i + 1:i + 1 + n] for n in lengths if s[i + 1:i + 1 + n] in names), None)
+      if name is None:
+        i = s.find('$', i + 1)
+        continue
+      if i > start: parts.append(s[start:i])
+      parts.append(Var(name))
+      start = i + 1 + len(name)
+      i = s.find('$', start)
+    if start < len(s): parts.append(s[start:])
+    return parts
+
+  def link(self, tokens: list[str | Var], holes: tuple[str, ...]) -> list[str | Var]:
+    parts: list[str | Var] = []
+    for token in tokens:
+      if isinstance(token, Var) and token.name not in holes:
+        parts.extend(self.resolve(token.name))
+      else:
+        parts.append(token)
+    merged: list[str | Var] = []
+    for part in parts:
+      if isinstance(part, str) and merged and isinstance(merged[-1], str):
+        merged[-1] += part
+      elif part != '':
+        merged.append(part)
+    return merged
+
+  def resolve(self, name: str) -> list[str | Var]:
+    if name in self.resolved: return self.resolved[name]
+    if name in self.resolving:
+      chain = self.resolving[self.resolving.index(name):] + [name]
+      raise ExpansionError(f'recursive variable {" -> ".join("$" + n for n in chain)}')
+    self.resolving.append(name)
+    tokens = self.tokenize(self.values[name], self.names)
+    self.resolved[name] = self.link(tokens, (BUILTIN_RANDOM,))
+    self.resolving.pop()
+    return self.resolved[name]
+
+  def compile(self, s: str, holes: tuple[str, ...] = ()) -> Template:
+    holes = holes + (BUILTIN_RANDOM,)
+    parts = self.link(self.tokenize(s, self.names | set(holes)), holes)
+    if len(holes) > 1:
+      # variable values may themselves mention $file & co.
+      names = set(holes)
+      parts = [t for p in parts for t in (self.tokenize(p, names) if isinstance(p, str) else [p])]
+    return Template(parts)
+
+  def expand(self, s: str) -> str:
+    return self.compile(s).render()
+
 def expand(on: str, config: dict[str, str]) -> str:
-  s = on
-  prev = None
-  while prev != s:
-    prev = s
-    for key, val in config.items():
-      s = s.replace(f'${key}', val)
-    s = s.replace('$root', str(Path(__file__).parent))
-    s = s.replace('$builtins.random', f'{''.join(random.choices('AZERTYUIOPQSDFGHJKLMWXCVBNazertyuiopqsdfghjklmwxcvbn', k=16))}')
-  return s
-
-def expand_list(on: list[str], config: dict[str, str]) -> list[str]:
-  return [expand(x, config) for x in on]
-
-def get_files(dir: str, excluded: list[str]) -> list[str]:
+  return Expander(config).expand(on)
+
+class SuffixIndex:
+  """Maps file names to the `for .ext:` patterns they end with, by looking up one slice per distinct suffix length."""
+  def __init__(self, patterns: dict[str, str]) -> None:
+    self.order: dict[str, int] = { ext: i for i, ext in enumerate(patterns) }
+    self.lengths: list[int] = sorted({ len(ext) for ext in patterns if ext })
+
+  def match(self, name: str) -> list[str]:
+    found = [name[-n:] for n in self.lengths if name[-n:] in self.order]
+    if len(found) > 1: found.sort(key=self.order.__getitem__)
+    return found
+
+class ListingCache:
+  """
+  Directory listings from previous runs, reused while the directory's mtime is
+  unchanged (adding, removing or renaming an entry updates it). A directory
+  modified within RACY_SECONDS of its listing is listed again next time. Only the
+  directories visited during this run are written back, if any were.
+  """
+  def __init__(self, path: Path) -> None:
+    self.path: Path = path
+    self.known: dict[str, dict[str, int | list[str]]] = {}
+    self.seen: dict[str, dict[str, int | list[str]]] = {}
+
+    if path.exists():
+      try:
+        with open(path, 'r') as f:
+          self.known = json.load(f)
+      except (OSError, ValueError) as e:
+        print(f'* ignoring unreadable listing cache {path}: {e}')
+
+  def listing(self, dir: str) -> tuple[list[str], list[str]]:
+    mtime = os.stat(dir).st_mtime_ns
+    entry = self.known.get(dir)
+    if entry is None or entry['mtime'] != mtime:
+      files, dirs = scan_dir(dir)
+      racy = mtime >= (time.time() - RACY_SECONDS) * 1e9
+      entry = { 'mtime': None if racy else mtime, 'files': files, 'dirs': dirs } # type: ignore[dict-item]
+    self.seen[dir] = entry
+    return entry['files'], entry['dirs'] # type: ignore[return-value]
+
+  def save(self) -> None:
+    # Nothing was walked (e.g. files came from git): keep the listings for the next walk.
+    if not self.seen: return
+    write_json(self.path, self.seen)
+
+def scan_dir(dir: str) -> tuple[list[str], list[str]]:
+  """Split the entries of dir into (files, subdirectories to descend into). Symlinked directories are not followed."""
   files: list[str] = []
-  for dirpath, _, filenames in os.walk(dir):
-    for filename in filenames:
-      full = str(Path(dirpath) / filename)
-      for ex in excluded:
-        if not full.startswith(ex):
-          files.append(str(Path(dirpath) / filename))
+  dirs: list[str] = []
+  with os.scandir(dir) as it:
+    for entry in it:
+      if not entry.is_dir():
+        files.append(entry.name)
+      elif not entry.is_symlink():
+        dirs.append(entry.name)
+  return files, dirs
+
+def git_listing(dir: str, excluded: list[str], index: SuffixIndex) -> list[tuple[str, list[str]]] | None:
+  """
+  Like get_files, but listed from the git index (tracked and untracked files,
+  without what .gitignore excludes). None outside of a git checkout.
+  """
+  listed = git_files(dir, untracked=True) if git_files else None
+  if listed is None: return None
+  skip = set(excluded)
+  files: list[tuple[str, list[str]]] = []
+  for rel in listed:
+    parts = rel.split('/')
+    exts = index.match(parts[-1])
+    if not exts: continue
+    full = dir
+    for part in parts:
+      full = os.path.join(full, part)
+      if full in skip: break
+    else:
+      files.append((full, exts))
+  return files
+
+def get_files(dir: str, excluded: list[str], index: SuffixIndex, 
+              cache: ListingCache | None = None, use_git: bool = False) -> list[tuple[str, list[str]]]:
+  """
+  Every file under dir matching a pattern of index, with the matched extensions.
+  With use_git, inside a git checkout, files come from the git index; otherwise
+  excluded paths are pruned during the walk, so their subtrees are never listed.
+  """
+  if use_git:
+    listed = git_listing(dir, excluded, index)
+    if listed is not None: return listed
+  skip = set(excluded)
+  files: list[tuple[str, list[str]]] = []
+  stack = [dir]
+  while stack:
+    current = stack.pop()
+    try:
+      names, subdirs = cache.listing(current) if cache else scan_dir(current)
+    except OSError:
+      continue
+    for name in names:
+      exts = index.match(name)
+      if exts:
+        full = os.path.join(current, name)
+        if full not in skip: files.append((full, exts))
+    stack.extend(reversed([p for p in (os.path.join(current, d) for d in subdirs) if p not in skip]))
   
   return files
 
-def compile_dir(dir: str, config: dict[str, str], patterns: dict[str, str], exclude: list[str]) -> int:
-  done_tasks = 0
-  files = get_files(dir, exclude)
-  for file in files:
-    for ext, pattern in patterns.items():   
-      if file.endswith(ext):
-        cmd = (
-          expand(pattern, config)
-          .replace('$filename', f'{file}')
-          .replace('$file', file)
-        )
+def run_jobs(jobs: list[Job], workers: int, on_success: Callable[[str, str, list[Built]], None], prof: Profiler) -> int:
+  """
+  Run (name, command, files built) jobs on a pool of workers. The output of each job is
+  printed as one block once it finishes. After the first failure no new job
+  is started; running ones are awaited and the failing exit code is returned.
+  """
+  if workers <= 1 or len(jobs) <= 1:
+    for file, cmd, built in jobs:
+      print(f'compiling file {file}...')
+      ret, _ = prof.shell('compile', file, cmd)
+      if ret != 0:
+        print(f'compilation for "{file}" failed with code {ret}')
+        return ret
+      on_success(file, cmd, built)
+    return 0
+
+  failure = 0
+  queue = iter(jobs)
+  running: dict[Future[tuple[int, str]], Job] = {}
+  with ThreadPoolExecutor(max_workers=workers) as pool:
+    def schedule() -> None:
+      while failure == 0 and len(running) < workers:
+        job = next(queue, None)
+        if job is None: return
+        running[pool.submit(prof.shell, 'compile', job[0], job[1], True)] = job
+
+    schedule()
+    while running:
+      done, _ = wait(running, return_when=FIRST_COMPLETED)
+      for future in done:
+        file, cmd, built = running.pop(future)
+        ret, output = future.result()
         print(f'compiling file {file}...')
-        ret = os.system(cmd)
+        if output: print(output, end='' if output.endswith('\n') else '\n')
         if ret != 0:
           print(f'compilation for "{file}" failed with code {ret}')
-          return ret
-        done_tasks += 1
+          failure = failure or ret
+        else:
+          on_success(file, cmd, built)
+      schedule()
 
-  print(f'* done {done_tasks} in {dir}')
-  return 0
+  return failure
+
+def shell_quote(path: str) -> str:
+  return subprocess.list2cmdline([path]) if sys.platform == 'win32' else shlex.quote(path)
+
+def make_batches(files: list[str], template: Template, max_files: int, max_length: int) -> list[list[str]]:
+  """
+  Split files, in order, into batches of at most max_files whose command
+  (template with $files) stays under max_length characters. A file too long
+  to fit with others still gets a batch of its own.
+  """
+  base = len(template.render({ BATCH_VAR: '' }))
+  refs = sum(1 for p in template.parts if isinstance(p, Var) and p.name == BATCH_VAR) or 1
+  batches: list[list[str]] = []
+  current: list[str] = []
+  length = 0
+  for file in files:
+    size = len(shell_quote(file)) + 1
+    if current and (len(current) >= max_files or base + refs * (length + size) > max_length):
+      batches.append(current)
+      current, length = [], 0
+    current.append(file)
+    length += size
+  if current: batches.append(current)
+  return batches
+
+def compile_dir(dir: str, expander: Expander, patterns: dict[str, str], outputs: dict[str, str], batches: dict[str, int],
+                exclude: list[str], db: BuildDB, opts: BuildOptions, listing: ListingCache | None) -> tuple[int, int]:
+  """
+  Compile every matching file of dir. Returns (exit code, number of up-to-date files skipped).
+  Files of rules declaring an output (`for .ext -> output:`) are also rebuilt when
+  that output is missing, and restored from the artifact cache when possible.
+  Files of batch rules (`for .ext batch:`) are passed together as $files, one
+  command per batch; each file is still recorded with the command it would get alone.
+  """
+  done_tasks = 0
+  skipped = 0
+  restored = 0
+  snapshot = config_digest(expander.config)
+  jobs: list[Job] = []
+  cached: dict[tuple[str, str], tuple[str, str]] = {}
+  pending: dict[str, list[tuple[str, Stamp]]] = {}
+  templates = { 
+    ext: expander.compile(pattern, (BATCH_VAR,) if ext in batches else FILE_VARS + (('output',) if ext in outputs else ())) 
+    for ext, pattern in patterns.items() 
+  }
+  out_templates = { ext: expander.compile(out, FILE_VARS) for ext, out in outputs.items() }
+  for file, exts in get_files(dir, exclude, SuffixIndex(patterns), listing, opts.git):
+    # Taken before compiling: an edit made while the file compiles must not be recorded as built.
+    stamp = db.digest(file)
+    for ext in exts:
+      if ext in batches:
+        if db.up_to_date(file, templates[ext].render({ BATCH_VAR: shell_quote(file) }), snapshot, stamp):
+          skipped += 1
+        else:
+          pending.setdefault(ext, []).append((file, stamp))
+        continue
+      values = { 'file': file, 'filename': file, 'stem': Path(file).stem }
+      output = out_templates[ext].render(values) if ext in out_templates else None
+      if output is not None: values['output'] = output
+      cmd = templates[ext].render(values)
+      if db.up_to_date(file, cmd, snapshot, stamp) and (output is None or os.path.exists(output)):
+        skipped += 1
+        continue
+      if output is not None and opts.cache:
+        key = opts.cache.key(cmd, stamp[0])
+        if not opts.force and opts.cache.restore(key, output):
+          db.record(file, cmd, snapshot, stamp)
+          restored += 1
+          continue
+        cached[(file, cmd)] = (key, output)
+      jobs.append((file, cmd, [(file, cmd, stamp)]))
+
+  for ext, stamped in pending.items():
+    stamps = dict(stamped)
+    for batch in make_batches(list(stamps), templates[ext], batches[ext] or opts.batch_size, opts.batch_length):
+      cmd = templates[ext].render({ BATCH_VAR: ' '.join(shell_quote(f) for f in batch) })
+      name = batch[0] if len(batch) == 1 else f'{batch[0]} (+{len(batch) - 1} more)'
+      built = [(f, templates[ext].render({ BATCH_VAR: shell_quote(f) }), stamps[f]) for f in batch]
+      jobs.append((name, cmd, built))
+
+  def done(name: str, cmd: str, built: list[Built]) -> None:
+    nonlocal done_tasks
+    for file, file_cmd, stamp in built:
+      db.record(file, file_cmd, snapshot, stamp)
+    if opts.cache and (name, cmd) in cached:
+      opts.cache.store(*cached[(name, cmd)])
+    done_tasks += len(built)
+
+  ret = run_jobs(jobs, opts.jobs, done, opts.profiler)
+  if ret != 0: return ret, skipped
+
+  print(f'* done {done_tasks} in {dir} ({skipped} up to date' + (f', {restored} restored from cache)' if restored else ')'))
+  return 0, skipped
+
+class Rule:
+  """A `rule: <outputs> from <inputs> do <command>` statement."""
+  def __init__(self, outputs: list[str], inputs: list[str], command: str) -> None:
+    self.outputs: list[str] = outputs
+    self.inputs: list[str] = inputs
+    self.command: str = command
+
+  @property
+  def name(self) -> str: return ', '.join(self.outputs)
+
+def split_list(s: str) -> list[str]:
+  return [x.strip() for x in s.split(',') if x.strip()]
+
+def is_glob(path: str) -> bool:
+  return any(c in path for c in '*?[')
 
-def compile(config: dict[str, str], patterns: dict[str, str], 
+def expand_rules(rules: list[Rule], expander: Expander) -> list[Rule]:
+  """
+  Expand variables in rules. Input globs match both existing files and the
+  outputs declared by other rules, so a link step can depend on `$out/*.o`.
+  """
+  expanded = [Rule([expander.expand(x) for x in r.outputs], [expander.expand(x) for x in r.inputs], r.command) for r in rules]
+  declared = [out for r in expanded for out in r.outputs]
+  for rule in expanded:
+    inputs: list[str] = []
+    for inp in rule.inputs:
+      if is_glob(inp):
+        inputs.extend(sorted(set(fnmatch.filter(declared, inp)) | set(glob.glob(inp))))
+      else:
+        inputs.append(inp)
+    rule.inputs = list(dict.fromkeys(inputs))
+    rule.command = expander.compile(rule.command, RULE_VARS).render({
+      'inputs': ' '.join(rule.inputs),
+      'outputs': ' '.join(rule.outputs)
+    })
+  return expanded
+
+def rule_graph(rules: list[Rule]) -> list[list[int]] | None:
+  """Return the dependents of every rule, or None (after reporting) if the graph is invalid."""
+  producer: dict[str, int] = {}
+  for i, rule in enumerate(rules):
+    for out in rule.outputs:
+      key = os.path.abspath(out)
+      if key in producer:
+        print(f'err: "{out}" is produced by more than one rule')
+        return None
+      producer[key] = i
+
+  dependents: list[list[int]] = [[] for _ in rules]
+  waiting = [0] * len(rules)
+  for i, rule in enumerate(rules):
+    for dep in { producer[k] for k in map(os.path.abspath, rule.inputs) if k in producer }:
+      dependents[dep].append(i)
+      waiting[i] += 1
+
+  ready = [i for i, n in enumerate(waiting) if n == 0]
+  for i in ready:
+    for d in dependents[i]:
+      waiting[d] -= 1
+      if waiting[d] == 0: ready.append(d)
+  if len(ready) != len(rules):
+    cycle = [rules[i].name for i, n in enumerate(waiting) if n > 0]
+    print(f'err: dependency cycle between rules: {"; ".join(cycle)}')
+    return None
+  return dependents
+
+def rule_reason(rule: Rule, inputs: dict[str, dict[str, str | int]], db: BuildDB) -> str | None:
+  """Why rule must run, or None if its outputs are up to date."""
+  if db.force: return 'forced'
+  try:
+    oldest = min(os.stat(out).st_mtime_ns for out in rule.outputs)
+  except (FileNotFoundError, ValueError):
+    return 'missing output'
+  if any(int(d['mtime']) > oldest for d in inputs.values()): return 'newer input'
+  if db.rule_changed(rule, inputs): return 'changed'
+  return None
+
+def run_rules(rules: list[Rule], db: BuildDB, opts: BuildOptions) -> tuple[int, int]:
+  """
+  Run rules in dependency order on a pool of workers. A rule is only executed
+  when one of its inputs is newer than its outputs or changed since its last
+  run. Returns (exit code, number of up-to-date rules).
+  """
+  dependents = rule_graph(rules)
+  if dependents is None: return -1, 0
+
+  waiting = [0] * len(rules)
+  for deps in dependents:
+    for d in deps: waiting[d] += 1
+
+  ready = [i for i, n in enumerate(waiting) if n == 0]
+  running: dict[Future[tuple[int, str]], tuple[int, dict[str, dict[str, str | int]]]] = {}
+  failure = 0
+  done_rules = 0
+  skipped = 0
+
+  def finish(i: int) -> None:
+    for d in dependents[i]:
+      waiting[d] -= 1
+      if waiting[d] == 0: ready.append(d)
+
+  with ThreadPoolExecutor(max_workers=opts.jobs) as pool:
+    while True:
+      while ready and failure == 0 and len(running) < opts.jobs:
+        i = ready.pop(0)
+        rule = rules[i]
+        try:
+          inputs = db.input_digests(rule)
+        except FileNotFoundError as e:
+          print(f'err: rule "{rule.name}": missing input {e.filename}')
+          failure = 1
+          break
+        reason = rule_reason(rule, inputs, db)
+        if reason is None:
+          skipped += 1
+          finish(i)
+          continue
+        for out in rule.outputs:
+          Path(out).parent.mkdir(parents=True, exist_ok=True)
+        running[pool.submit(opts.profiler.shell, 'rule', rule.name, rule.command, True)] = (i, inputs)
+        print(f'building {rule.name} ({reason})...')
+
+      if not running: break
+      done, _ = wait(running, return_when=FIRST_COMPLETED)
+      for future in done:
+        i, inputs = running.pop(future)
+        ret, output = future.result()
+        if output: print(output, end='' if output.endswith('\n') else '\n')
+        if ret != 0:
+          print(f'rule "{rules[i].name}" failed with code {ret}')
+          failure = failure or ret
+        else:
+          db.record_rule(rules[i], inputs)
+          done_rules += 1
+          finish(i)
+
+  if failure != 0: return failure, skipped
+  print(f'* done {done_rules} rule(s) ({skipped} up to date)')
+  return 0, skipped
+
+def compile(config: dict[str, str], patterns: dict[str, str], outputs: dict[str, str], batches: dict[str, int],
           commands: list[str], exclude: list[str], 
-          check: list[str], include: list[str]) -> int:
+          check: list[str], include: list[str], rules: list[Rule], db: BuildDB, opts: BuildOptions) -> int:
+  listing = ListingCache(db.path.parent / LISTING_DB) if opts.walk_cache else None
+  if opts.cache_dir: opts.cache = ArtifactCache(Path(opts.cache_dir), opts.cache_size)
+  try:
+    return compile_all(config, patterns, outputs, batches, commands, exclude, check, include, rules, db, opts, listing)
+  finally:
+    db.save()
+    if listing: listing.save()
+    if opts.cache:
+      opts.cache.save()
+      if opts.cache.hits: print(f'* {opts.cache.hits} output(s) restored from {opts.cache.root}')
+    if opts.profile:
+      trace = Path(opts.trace) if opts.trace else db.path.parent / TRACE_FILE
+      opts.profiler.write_trace(trace)
+      print(opts.profiler.summary(opts.profile_top))
+      print(f'* trace written to {trace}')
+
+def compile_all(config: dict[str, str], patterns: dict[str, str], outputs: dict[str, str], batches: dict[str, int],
+          commands: list[str], exclude: list[str], 
+          check: list[str], include: list[str], rules: list[Rule], db: BuildDB, opts: BuildOptions,
+          listing: ListingCache | None) -> int:
   done_tasks = 0
+  skipped = 0
+  expander = Expander(config)
 
   for cmd in commands:
-    cmd = expand(cmd, config)
-    ret = os.system(cmd)
+    cmd = expander.expand(cmd)
+    ret, _ = opts.profiler.shell('cmd', cmd, cmd)
     if ret != 0:
       return ret
     done_tasks += 1
 
-  excluded_paths = [str(Path(e).resolve()) for e in expand_list(exclude, config)]
+  excluded_paths = [str(Path(expander.expand(e)).resolve()) for e in exclude]
+  excluded_paths.append(str(db.path.parent.resolve()))
   for inc in include: 
-    ret = compile_dir(str(Path(inc).absolute()), config, patterns, [])
+    ret, n = compile_dir(str(Path(inc).absolute()), expander, patterns, outputs, batches, [], db, opts, listing)
+    skipped += n
     if ret != 0: return ret
     print(f'* done dependency {inc}')
 
-  ret = compile_dir(str(Path(__file__).parent), config, patterns, excluded_paths)
+  ret, n = compile_dir(str(Path(__file__).parent), expander, patterns, outputs, batches, excluded_paths, db, opts, listing)
+  skipped += n
   if ret != 0: return ret
+
+  if rules:
+    ret, n = run_rules(expand_rules(rules, expander), db, opts)
+    skipped += n
+    if ret != 0: return ret
+  if skipped:
+    print(f'* skipped {skipped} up-to-date file(s) and rule(s)')
   
   for i in range(0, len(check)):
     cmd = check[i]
-    cmd = expand(cmd, config)
+    cmd = expander.expand(cmd)
     print(f'* [{i}/{len(check)}] checking...')
-    ret = os.system(cmd)
+    ret, _ = opts.profiler.shell('check', cmd, cmd)
     if ret != 0:
       print(f'* [{i}/{len(check)}] fail!')
       return ret
@@ -111,13 +916,16 @@ def compile(config: dict[str, str], patterns: dict[str, str],
   return 0
 
 
-def parse(file: str, cfg: dict[str, str]) -> int:
+def parse(file: str, cfg: dict[str, str], opts: BuildOptions) -> int:
   config: dict[str, str] = cfg
   patterns: dict[str, str] = {}
+  outputs: dict[str, str] = {}
+  batches: dict[str, int] = {}
   commands: list[str] = []
   exclude: list[str] = []
   check: list[str] = []
   include: list[str] = []
+  rules: list[Rule] = []
 
   path = Path(file)
   if not path.exists():
@@ -134,24 +942,44 @@ def parse(file: str, cfg: dict[str, str]) -> int:
         try:
           _, rest = line.split('for ', 1)
           ext, pat = rest.split(':', 1)
-          patterns[ext.strip()] = pat.strip()
-        except ValueError:
-          print('err: ill-formed format. Use "for .ext : command"')
+          if ' -> ' in ext:
+            ext, out = ext.split(' -> ', 1)
+            outputs[ext.strip()] = out.strip()
+          words = ext.split()
+          if len(words) > 1:
+            # for .ext batch [N]: command with $files
+            size = words[2] if len(words) == 3 else '0'
+            if words[1] != 'batch' or len(words) > 3 or not size.isdigit() or words[0] in outputs:
+              raise ValueError
+            batches[words[0]] = int(size)
+          patterns[words[0]] = pat.strip()
+        except (ValueError, IndexError):
+          print('err: ill-formed format. Use "for .ext [-> output]: command" or "for .ext batch [N]: command with $files"')
           return -1
 
       elif line.startswith(TT_CMD):
         commands.append(line[len(TT_CMD):].strip())
 
+      elif line.startswith(TT_RULE):
+        # leading space so that empty output/input lists still split
+        rest = ' ' + line[len(TT_RULE):].strip()
+        if ' from ' not in rest or ' do ' not in rest:
+          print('err: ill-formed rule. Use "rule: <outputs> from <inputs> do <command>"')
+          return -1
+        outs, rest = rest.split(' from ', 1)
+        ins, command = (' ' + rest).split(' do ', 1)
+        rules.append(Rule(split_list(outs), split_list(ins), command.strip()))
+
       elif line.startswith(TT_EXCLUDE):
         files = line[len(TT_EXCLUDE):].strip().split(',')
         exclude.extend(f.strip() for f in files if f.strip())
 
-      elif line.startswith(TT_CMD):
-        tcheck = line[len(TT_EXCLUDE):].strip()
+      elif line.startswith(TT_CHECK):
+        tcheck = line[len(TT_CHECK):].strip()
         check.append(tcheck)
 
       elif line.startswith(TT_INCLUDE):
-        inc = line[len(TT_INCLUDE)].strip()
+        inc = line[len(TT_INCLUDE):].strip()
         include.append(inc)
             
       elif line.startswith(TT_DOWNLOAD):
@@ -161,9 +989,13 @@ def parse(file: str, cfg: dict[str, str]) -> int:
             print('err: ill-formed download statement')
             return -1
         atpos = rest.find(' in ')
-        link = rest[0:atpos].strip()
+        link = expand(rest[0:atpos].strip(), config)
         at = rest[atpos+len(' in '):].strip()
-        ret = download_file(link, at)
+        sha256 = None
+        if ' sha256:' in at:
+          at, sha256 = at.rsplit(' sha256:', 1)
+          sha256 = sha256.strip().lower()
+        ret = download_file(link, expand(at.strip(), config), sha256)
         if ret != 0: return ret
                 
       elif line.startswith('when:'):
@@ -229,7 +1061,8 @@ def parse(file: str, cfg: dict[str, str]) -> int:
           return -1
         config[key] = val.strip()
     
-  return compile(config, patterns, commands, exclude, check, include)
+  db = BuildDB(path.parent / YANG_DIR / BUILD_DB, opts.force)
+  return compile(config, patterns, outputs, batches, commands, exclude, check, include, rules, db, opts)
 
 
 def main(argv: list[str]) -> int:
@@ -239,6 +1072,7 @@ def main(argv: list[str]) -> int:
     
   flags = argv[0:]
   defs: dict[str, str] = {}
+  opts = BuildOptions()
   
   defs['windows'] = 'win32'
   defs['linux'] = 'linux'
@@ -247,13 +1081,27 @@ def main(argv: list[str]) -> int:
   defs['platform'] = sys.platform
   defs['home'] = str(Path.home())
   
-  for flag in flags:
-    if ':' in flag:
+  i = 0
+  while i < len(flags):
+    flag = flags[i]
+    if flag.startswith('-'):
+      used = opts.apply(flag, flags[i + 1] if i + 1 < len(flags) else None)
+      if not used:
+        print(f'*** Unknown option {flag}')
+        return -1
+      i += used
+      continue
+    elif ':' in flag:
       key, val = flag.split(':', 1)
       defs[key.strip()] = val.strip()
     else: defs[flag.strip()] = ''
+    i += 1
   
-  return parse(argv[0], defs)
+  try:
+    return parse(argv[0], defs, opts)
+  except ExpansionError as e:
+    print(f'err: {e}')
+    return -1
 
 if __name__ == '__main__': 
   try:
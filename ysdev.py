@@ -7,11 +7,54 @@ Usage:
     ./ysdev.py update    # pulls latest from GitHub and re-copies files
     ./ysdev.py build     # runs scripts/Build.py
     ./ysdev.py specs     # shows specs info
+
+    ./ysdev.py --profile-startup <command>   # reports startup phases and import costs
+    ./ysdev.py startup-bench [-n N] [--budget MS] [command...]
 """
 
+import time
+STARTED = time.perf_counter()
+
+import sys
+
+def profile_imports(imports: dict[str, list[float]]) -> None:
+  """Time every import statement executed from now on (main thread only) into imports: module -> [cumulative, self]."""
+  import builtins
+  import threading
+  original = builtins.__import__
+  main_thread = threading.main_thread()
+  children: list[float] = []
+
+  def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if (level == 0 and name in sys.modules) or threading.current_thread() is not main_thread:
+      return original(name, globals, locals, fromlist, level)
+    children.append(0.0)
+    start = time.perf_counter()
+    try:
+      return original(name, globals, locals, fromlist, level)
+    finally:
+      total = time.perf_counter() - start
+      own = total - children.pop()
+      if children: children[-1] += total
+      if level and globals and globals.get('__package__'):
+        base = globals['__package__'].rsplit('.', level - 1)[0]
+        name = f"{base}.{name}" if name else base
+      entry = imports.setdefault(name, [0.0, 0.0])
+      entry[0] += total
+      entry[1] += own
+
+  builtins.__import__ = timed_import
+
+# Hooked before ysdev's own imports below, so that --profile-startup reports them too.
+STARTUP_IMPORTS: dict[str, list[float]] = {}
+STARTUP_IMPORTS_HOOKED = '--profile-startup' in sys.argv
+if STARTUP_IMPORTS_HOOKED:
+  profile_imports(STARTUP_IMPORTS)
+
 import glob
+import os
 import re
-import sys
+import signal
 import subprocess
 import shutil
 import importlib.util
@@ -106,11 +149,8 @@ def run_python_script(python_exec: Path, script: str) -> None:
         print(f"{Ansi.RED}[ERR]{Ansi.RESET} Script still failed after retry: {script}")
         sys.exit(result)
 
-def process_repo(repo_dir: Path) -> None:
-  """Set up a repository: venv, dependencies, run matching scripts, and cleanup."""
-  print(f"{Ansi.BOLD}{Ansi.CYAN}[PROC]{Ansi.RESET} Processing repository at {repo_dir}")
-
-  # Virtual environment
+def make_local_venv(repo_dir: Path, req_file: Path) -> Path:
+  """Fallback for process_repo when scripts/venvs.py is not available: a per-repo .venv."""
   venv_dir = repo_dir / ".venv"
   if venv_dir.exists():
     print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Virtual environment already exists in {repo_dir}")
@@ -121,8 +161,6 @@ def process_repo(repo_dir: Path) -> None:
   python_exec = venv_dir / "bin" / "python"
   pip_exec = venv_dir / "bin" / "pip"
 
-  # Dependencies
-  req_file = repo_dir / "requirements.txt"
   if req_file.exists():
     print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Installing dependencies in {repo_dir}...")
     run([f"{pip_exec} install -r {req_file}"])
@@ -131,6 +169,22 @@ def process_repo(repo_dir: Path) -> None:
     if DEFAULT_DEPS:
       print(f"{Ansi.YELLOW}[INFO]{Ansi.RESET} Installing fallback dependencies: {', '.join(DEFAULT_DEPS)}")
       run([f"{pip_exec} install {' '.join(DEFAULT_DEPS)}"])
+  return python_exec
+
+def process_repo(repo_dir: Path) -> None:
+  """Set up a repository: venv, dependencies, run matching scripts, and cleanup."""
+  print(f"{Ansi.BOLD}{Ansi.CYAN}[PROC]{Ansi.RESET} Processing repository at {repo_dir}")
+
+  # Dependencies: prefer the shared venv cache when the scripts are installed
+  req_file = repo_dir / "requirements.txt"
+  try:
+    import scripts.venvs as venvs
+    if req_file.exists():
+      python_exec = venvs.ensure_venv(venvs.read_requirements(req_file), req_file)
+    else:
+      python_exec = venvs.ensure_venv(DEFAULT_DEPS)
+  except ImportError:
+    python_exec = make_local_venv(repo_dir, req_file)
 
   # Script execution
   pattern = str(repo_dir / "validations" / "v_*.py")
@@ -197,6 +251,40 @@ def pull_repo():
 
   return True
 
+class StartupProfile:
+  """Phase timings and per-module import cost, reported by --profile-startup."""
+  def __init__(self) -> None:
+    self.enabled: bool = False
+    self.last: float = STARTED
+    self.phases: list[tuple[str, float]] = []
+    self.imports: dict[str, list[float]] = STARTUP_IMPORTS   # module -> [cumulative, self]
+
+  def enable(self) -> None:
+    """Report at exit; imports are timed from the top of ysdev.py when --profile-startup was given."""
+    if not STARTUP_IMPORTS_HOOKED:
+      profile_imports(self.imports)
+    self.enabled = True
+
+  def mark(self, phase: str) -> None:
+    """Close the current phase."""
+    now = time.perf_counter()
+    self.phases.append((phase, now - self.last))
+    self.last = now
+
+  def report(self, top: int = 15) -> str:
+    total = sum(duration for _, duration in self.phases)
+    lines = [f"{Ansi.BRIGHT_CYAN}Startup profile{Ansi.RESET} ({total * 1000:.1f} ms after interpreter start)"]
+    for phase, duration in self.phases:
+      lines.append(f"  {phase:<10} {duration * 1000:9.2f} ms")
+    if self.imports:
+      lines.append(f"{Ansi.BRIGHT_CYAN}Slowest imports{Ansi.RESET} (self / cumulative)")
+      ranked = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+      for module, (cumulative, own) in ranked:
+        lines.append(f"  {own * 1000:9.2f} ms {cumulative * 1000:9.2f} ms  {module}")
+    return '\n'.join(lines)
+
+STARTUP = StartupProfile()
+
 # ------------------------------------------------
 # Commands
 # ------------------------------------------------
@@ -216,8 +304,7 @@ def cmd_install(_args: list[str]) -> int:
 def cmd_update(args: list[str]) -> int:
   try:
     import scripts.s_YumStudio as YS
-    YS.main(args)
-    return 0 # YS.main() always returns 0
+    return YS.main(args)
   except ImportError as e:
     print(f"{Ansi.BRIGHT_RED}{ME}: scripts.s_YumStudio not found. Try 'install'.{Ansi.RESET}\n{e}")
     return 1
@@ -240,32 +327,212 @@ def cmd_specs(_args: list[str]) -> int:
     print(f"{Ansi.BRIGHT_RED}{ME}: scripts.specsV2 not found. Try 'install'.{Ansi.RESET}")
     return 1
 
-def cmd_validate(_args: list[str]) -> int:
-  """Run all validation scripts (validations/v_*.py)."""
-  validations_dir = Path("validations")
-
-  if not validations_dir.exists():
+VALIDATIONS_DIR = Path("validations")
+VALIDATION_LOGS = Path(".ys-logs") / "validations"
+DEFAULT_TIMEOUT = 1800.0
+
+class Validation:
+  """One validations/v_*.py script and the outcome of its last attempt."""
+  def __init__(self, path: Path, serial: bool, flaky: bool, timeout: float) -> None:
+    self.path: Path = path
+    self.name: str = path.stem.replace("v_", "")
+    self.serial: bool = serial
+    self.flaky: bool = flaky
+    self.timeout: float = timeout
+    self.log: Path = VALIDATION_LOGS / f"{self.name}.log"
+    self.status: str = "skipped"   # passed | failed | timeout | skipped
+    self.code: int | None = None
+    self.duration: float = 0.0
+    self.attempts: int = 0
+
+  def as_dict(self) -> dict:
+    return {"name": self.name, "script": str(self.path), "status": self.status, "code": self.code,
+            "duration": round(self.duration, 3), "attempts": self.attempts,
+            "serial": self.serial, "flaky": self.flaky, "log": str(self.log)}
+
+class RunningValidations:
+  """
+  Validations run in their own session, so Ctrl-C does not reach them:
+  their process groups are tracked here and killed together on interrupt.
+  """
+  def __init__(self) -> None:
+    import threading
+    self.lock = threading.Lock()
+    self.procs: set[subprocess.Popen] = set()
+    self.stopped: bool = False
+
+  def start(self, cmd: list[str], log) -> subprocess.Popen | None: # type: ignore
+    """Start cmd in a new session, or return None once stop() was called."""
+    with self.lock:
+      if self.stopped: return None
+      proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT,
+                              stdin=subprocess.DEVNULL, start_new_session=True)
+      self.procs.add(proc)
+      return proc
+
+  def finished(self, proc: subprocess.Popen) -> None:
+    with self.lock:
+      self.procs.discard(proc)
+
+  def stop(self) -> None:
+    with self.lock:
+      self.stopped = True
+      for proc in self.procs:
+        try: os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError: pass
+
+def run_validation(validation: Validation, retries: int, running: RunningValidations) -> Validation:
+  """
+  Run one validation into its log, killing its whole process group on timeout.
+  Flaky validations are retried up to `retries` more times.
+  """
+  attempts = 1 + (retries if validation.flaky else 0)
+  start = time.monotonic()
+  with open(validation.log, "w", encoding="utf-8") as log:
+    for attempt in range(1, attempts + 1):
+      validation.attempts = attempt
+      log.write(f"$ python3 {validation.path} (attempt {attempt}/{attempts})\n")
+      log.flush()
+      proc = running.start(["python3", str(validation.path)], log)
+      if proc is None:
+        break
+      try:
+        validation.code = proc.wait(timeout=validation.timeout)
+        validation.status = "passed" if validation.code == 0 else "failed"
+      except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+        validation.code = None
+        validation.status = "timeout"
+        log.write(f"\n[TIMEOUT] killed after {validation.timeout:g}s\n")
+      finally:
+        running.finished(proc)
+      if validation.status == "passed" or running.stopped:
+        break
+  validation.duration = time.monotonic() - start
+
+  retried = f" after {validation.attempts} attempts" if validation.attempts > 1 else ""
+  if validation.status == "passed":
+    print(f"{Ansi.BRIGHT_GREEN}[OK]{Ansi.RESET} Validation passed: {validation.name} ({validation.duration:.1f}s{retried})")
+  elif validation.status == "timeout":
+    print(f"{Ansi.BRIGHT_RED}[TIMEOUT]{Ansi.RESET} Validation timed out: {validation.name} ({validation.timeout:g}s{retried}), see {validation.log}")
+  else:
+    print(f"{Ansi.BRIGHT_RED}[FAIL]{Ansi.RESET} Validation failed: {validation.name} (code {validation.code}{retried}), see {validation.log}")
+  return validation
+
+def write_junit(validations: list[Validation], path: Path, duration: float) -> None:
+  import xml.etree.ElementTree as ET
+  failures = sum(1 for v in validations if v.status == "failed")
+  errors = sum(1 for v in validations if v.status == "timeout")
+  suite = ET.Element("testsuite", name="validations", tests=str(len(validations)),
+                     failures=str(failures), errors=str(errors), time=f"{duration:.3f}")
+  for v in validations:
+    case = ET.SubElement(suite, "testcase", classname="validations", name=v.name, time=f"{v.duration:.3f}")
+    if v.status == "failed":
+      ET.SubElement(case, "failure", message=f"exit code {v.code}")
+    elif v.status == "timeout":
+      ET.SubElement(case, "error", message=f"timed out after {v.timeout:g}s")
+    elif v.status == "skipped":
+      ET.SubElement(case, "skipped")
+    if v.log.exists():
+      ET.SubElement(case, "system-out").text = v.log.read_text(encoding="utf-8", errors="replace")
+  ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+def cmd_validate(args: list[str]) -> int:
+  """
+  Run all validation scripts (validations/v_*.py).
+    -j N / --jobs N   validations run concurrently (default: CPU count)
+    --timeout SEC     per-validation timeout (default: metadata `timeout:`, else 1800)
+    --retries N       extra attempts for validations listed in metadata `flaky:` (default 1)
+  Validations listed in metadata `serial:` run alone, after the concurrent ones.
+  Results are written to .ys-logs/validations/ (logs, report.json, junit.xml).
+  """
+  import json
+  from concurrent.futures import ThreadPoolExecutor
+
+  if not VALIDATIONS_DIR.exists():
     print(f"{Ansi.BRIGHT_RED}{ME}: No 'validations' directory found!{Ansi.RESET}")
     return 1
 
-  scripts = sorted(validations_dir.glob("v_*.py"))
+  scripts = sorted(VALIDATIONS_DIR.glob("v_*.py"))
   if not scripts:
-    print(f"{Ansi.BRIGHT_YELLOW}{ME}: No validation scripts found in {validations_dir}{Ansi.RESET}")
+    print(f"{Ansi.BRIGHT_YELLOW}{ME}: No validation scripts found in {VALIDATIONS_DIR}{Ansi.RESET}")
     return 1
 
-  print(f"{Ansi.BRIGHT_CYAN}{ME}: Starting validations...{Ansi.RESET}")
-
-  for script_path in scripts:
-    # Extract readable name
-    name = script_path.stem.replace("v_", "")
-    print(f"{Ansi.BRIGHT_BLUE}[VAL]{Ansi.RESET} Running validation: {Ansi.BOLD}{name}{Ansi.RESET}")
-    result = run(["python3", str(script_path)])
-
-    if result:
-      print(f"{Ansi.BRIGHT_GREEN}[OK]{Ansi.RESET} Validation passed: {name}")
-    else:
-      print(f"{Ansi.BRIGHT_RED}[FAIL]{Ansi.RESET} Validation failed: {name}")
+  from validations.tables import Table
+  metadata_file = VALIDATIONS_DIR / "metadata.txt"
+  metadata = Table(str(metadata_file)).keys if metadata_file.exists() else {}
+  jobs = os.cpu_count() or 1
+  timeout = float(metadata.get("timeout", DEFAULT_TIMEOUT))
+  timeout_given = False
+  retries = 1
+  i = 0
+  try:
+    while i < len(args):
+      arg = args[i]
+      if arg in ("-j", "--jobs"):
+        jobs = int(args[i + 1]); i += 1
+      elif arg.startswith("-j") and arg[2:].isdigit():
+        jobs = int(arg[2:])
+      elif arg == "--timeout":
+        timeout = float(args[i + 1]); timeout_given = True; i += 1
+      elif arg == "--retries":
+        retries = int(args[i + 1]); i += 1
+      elif arg != '':
+        print(f"{Ansi.BRIGHT_RED}{ME}: unknown option {arg}{Ansi.RESET}")
+        return 1
+      i += 1
+  except (IndexError, ValueError):
+    print(f"{Ansi.BRIGHT_RED}{ME}: option {args[i]} needs a number{Ansi.RESET}")
+    return 1
 
+  serial = set(metadata.get("serial", "").replace(',', ' ').split())
+  flaky = set(metadata.get("flaky", "").replace(',', ' ').split())
+  validations: list[Validation] = []
+  for path in scripts:
+    name = path.stem.replace("v_", "")
+    own_timeout = timeout if timeout_given else float(metadata.get(f"timeout.{name}", timeout))
+    validations.append(Validation(path, name in serial, name in flaky, own_timeout))
+
+  VALIDATION_LOGS.mkdir(parents=True, exist_ok=True)
+  concurrent = [v for v in validations if not v.serial]
+  exclusive = [v for v in validations if v.serial]
+  print(f"{Ansi.BRIGHT_CYAN}{ME}: Starting {len(validations)} validations "
+        f"({len(concurrent)} concurrent with -j {max(1, jobs)}, {len(exclusive)} serial)...{Ansi.RESET}")
+
+  start = time.monotonic()
+  running = RunningValidations()
+  pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+  try:
+    list(pool.map(lambda v: run_validation(v, retries, running), concurrent))
+    for validation in exclusive:
+      print(f"{Ansi.BRIGHT_BLUE}[VAL]{Ansi.RESET} Running serial validation: {Ansi.BOLD}{validation.name}{Ansi.RESET}")
+      run_validation(validation, retries, running)
+  except KeyboardInterrupt:
+    running.stop()
+    raise
+  finally:
+    pool.shutdown(wait=True, cancel_futures=True)
+  duration = time.monotonic() - start
+
+  failed = [v for v in validations if v.status != "passed"]
+  print(f"\n{Ansi.BOLD}Validation summary{Ansi.RESET}")
+  width = max(len(v.name) for v in validations)
+  for v in validations:
+    color = Ansi.BRIGHT_GREEN if v.status == "passed" else Ansi.BRIGHT_RED
+    print(f"  {v.name.ljust(width)}  {color}{v.status:<8}{Ansi.RESET} {v.duration:8.2f}s"
+          f"{'  (serial)' if v.serial else ''}{f'  ({v.attempts} attempts)' if v.attempts > 1 else ''}")
+  print(f"  {'total'.ljust(width)}  {len(validations) - len(failed)}/{len(validations)} passed {duration:6.2f}s wall-clock")
+
+  with open(VALIDATION_LOGS / "report.json", "w", encoding="utf-8") as f:
+    json.dump({"duration": round(duration, 3), "jobs": jobs, "failed": len(failed),
+               "validations": [v.as_dict() for v in validations]}, f, indent=2)
+  write_junit(validations, VALIDATION_LOGS / "junit.xml", duration)
+  print(f"{ME}: Results written to {VALIDATION_LOGS / 'report.json'} and {VALIDATION_LOGS / 'junit.xml'}")
+
+  if failed:
+    print(f"{Ansi.BRIGHT_RED}{ME}: {len(failed)} validation(s) failed!{Ansi.RESET}")
+    return 1
   print(f"{Ansi.BRIGHT_MAGENTA}{ME}: All validations finished!{Ansi.RESET}")
   return 0
 
@@ -313,6 +580,53 @@ def cmd_get_gh(argv: list[str]) -> int:
     print(f"{Ansi.BRIGHT_RED}{ME}: scripts.get_gh not found. Try 'install'.{Ansi.RESET}")
     return 1
 
+def cmd_startup_bench(args: list[str]) -> int:
+  """
+  Measure ysdev.py startup over N runs of `command` (default: the app listing).
+  Cold runs start without the Tayang manifest and with an empty bytecode cache;
+  warm runs reuse both. With --budget MS, fails when the warm median exceeds it.
+  """
+  import statistics
+  import tempfile
+  runs, budget, command = 10, None, []
+  i = 0
+  try:
+    while i < len(args):
+      if args[i] == "-n": runs = max(1, int(args[i + 1])); i += 1
+      elif args[i] == "--budget": budget = float(args[i + 1]); i += 1
+      elif args[i] != '': command.append(args[i])
+      i += 1
+  except (IndexError, ValueError):
+    print(f"{Ansi.BRIGHT_RED}{ME}: usage: startup-bench [-n N] [--budget MS] [command...]{Ansi.RESET}")
+    return 1
+
+  cmd = [sys.executable, str(Path(__file__).resolve()), *command]
+
+  def timed(env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, env={**env, "YSDEV_NO_DAEMON": "1"}, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+  cold: list[float] = []
+  for _ in range(runs):
+    TAYANG_CACHE.unlink(missing_ok=True)
+    with tempfile.TemporaryDirectory() as pycache:
+      cold.append(timed({**os.environ, "PYTHONPYCACHEPREFIX": pycache}))
+  timed(dict(os.environ))
+  warm = [timed(dict(os.environ)) for _ in range(runs)]
+
+  print(f"{ME}: startup of `{' '.join(['ysdev.py', *command])}` over {runs} run(s)")
+  for label, samples in (("cold", cold), ("warm", warm)):
+    print(f"  {label}  min {min(samples):8.1f} ms  median {statistics.median(samples):8.1f} ms  max {max(samples):8.1f} ms")
+  if budget is not None:
+    median = statistics.median(warm)
+    if median > budget:
+      print(f"{Ansi.BRIGHT_RED}{ME}: warm startup {median:.1f} ms exceeds the {budget:g} ms budget{Ansi.RESET}")
+      return 1
+    print(f"{Ansi.BRIGHT_GREEN}{ME}: warm startup {median:.1f} ms is within the {budget:g} ms budget{Ansi.RESET}")
+  return 0
+
 # ------------------------------------------------
 # Dispatcher
 # ------------------------------------------------
@@ -357,46 +671,123 @@ def get_builtin_applications() -> dict[str, TayangApp]: return {
   "test": TayangApp('test', 'tests YumStudio using the validations folder', cmd_validate),
   "pull": TayangApp('pull', 'updates YumStudio using the official Git repository. This may remove your changes', cmd_update_upstream),
   "nuke": TayangApp('nuke', 'forces the update with the official Git repository. Deletes everything.', cmd_force_update),
-  "get-gh": TayangApp('get-gh', 'Download selected assets from a GitHub release (latest or specific tag).', cmd_get_gh)
+  "get-gh": TayangApp('get-gh', 'Download selected assets from a GitHub release (latest or specific tag).', cmd_get_gh),
+  "startup-bench": TayangApp('startup-bench', 'Measures cold and warm startup time of ysdev.py, optionally against a budget.', cmd_startup_bench),
+  "daemon": TayangApp('daemon', 'start|stop|status a background ysdev that keeps Tayang apps loaded.', cmd_daemon)
 }
 
+TAYANG_CACHE = Path(".ysdev") / "tayang.json"
+
+def mtime_ns(path: str) -> int | None:
+  try: return os.stat(path).st_mtime_ns
+  except OSError: return None
+
+def scan_Tayang_directory(directory: str) -> dict:
+  """
+  Find the *.tayang apps under directory, recording the mtime of every directory
+  walked (and of each app's desc.txt) so the result can be revalidated without a walk.
+  """
+  dirs: dict[str, int | None] = {directory: mtime_ns(directory)}
+  apps: list[dict] = []
+  for root, subdirs, _ in os.walk(directory):
+    subdirs.sort()
+    for sub in list(subdirs):
+      path = os.path.join(root, sub)
+      if not sub.endswith('.tayang'):
+        dirs[path] = mtime_ns(path)
+        continue
+      # Apps are leaves: their content is only looked at when they are launched.
+      subdirs.remove(sub)
+      app = Path(path)
+      dirs[str(app / "Resources")] = mtime_ns(str(app / "Resources"))
+      dirs[str(app / "Content")] = mtime_ns(str(app / "Content"))
+      desc_path = app / "Resources" / "desc.txt"
+      if not desc_path.exists():
+        print(f'{Ansi.YELLOW}[WARN]: No such desc.txt file found in {app / "Resources"} -- skipping{Ansi.RESET}')
+        continue
+      if not (app / "Content" / "launch.py").exists():
+        print(f'{Ansi.YELLOW}[WARN]: No such launch.py file found in {app / "Content"} -- skipping{Ansi.RESET}')
+        continue
+      with open(desc_path) as descfile:
+        desc = '\n'.join(descfile.readlines())
+      apps.append({"name": sub[0:sub.rfind(".tayang")], "desc": desc, "path": str(app),
+                   "desc_mtime": mtime_ns(str(desc_path))})
+  return {"dirs": dirs, "apps": apps}
+
+def Tayang_entry_valid(entry: dict) -> bool:
+  if any(mtime_ns(path) != mtime for path, mtime in entry["dirs"].items()):
+    return False
+  return all(mtime_ns(os.path.join(app["path"], "Resources", "desc.txt")) == app["desc_mtime"] for app in entry["apps"])
+
+def discover_Tayang_applications(dirs: list[str]) -> list[dict]:
+  """
+  Manifest of the Tayang apps found in dirs (name, desc, path), cached in .ysdev/tayang.json.
+  A search directory is only walked again when one of its directories (or a desc.txt) changed.
+  """
+  import json
+  try:
+    with open(TAYANG_CACHE, "r", encoding="utf-8") as f:
+      manifest: dict = json.load(f)
+  except (OSError, ValueError):
+    manifest = {}
+
+  changed = False
+  apps: list[dict] = []
+  for directory in dirs:
+    entry = manifest.get(directory)
+    if entry is None or not Tayang_entry_valid(entry):
+      entry = scan_Tayang_directory(directory)
+      manifest[directory] = entry
+      changed = True
+    apps.extend(entry["apps"])
+
+  if changed:
+    # The manifest is only a speedup: without scripts/ (before `install`) it is not written.
+    try:
+      from scripts.caches import write_json
+      write_json(TAYANG_CACHE, {directory: manifest[directory] for directory in dirs})
+    except (ImportError, OSError):
+      pass
+  return apps
+
+def lazy_main(path: Path) -> Callable[[list[str]], int]:
+  """Invoker that imports the app's launch.py only when the app is launched."""
+  def launch(argv: list[str]) -> int:
+    main = load_main_from(path)
+    STARTUP.mark("import")
+    return main(argv)
+  return launch
+
 def load_Tayang_applications(dirs: list[str]) -> dict[str, TayangApp]:
   loaded: dict[str, TayangApp] = get_builtin_applications()
-  found: list[Path] = []
-  
-  for directory in dirs:
-    for path in Path(directory).rglob("*.tayang"):
-      found.append(path)
-  
-  for app in found:
-    trap: str = str(app) # js a joke with str + app...
-    foldername = (Path(trap).name)
-    name = foldername[0:foldername.rfind('.tayang')]
-    
-    if not (app / "Resources" / "desc.txt").exists():
-      print(f'{Ansi.YELLOW}[WARN]: No such desc.txt file found in {app / "Resources"} -- skipping{Ansi.RESET}')
-      continue
-    if not (app / "Content" / "launch.py").exists(): 
-      print(f'{Ansi.YELLOW}[WARN]: No such launch.py file found in {app / "Content"} -- skipping{Ansi.RESET}')
-      continue
 
-    desc: str = ''
-    
-    with open(app / "Resources" / "desc.txt") as descfile:
-      desc += '\n'.join(descfile.readlines())
-      descfile.close()
-    
-    launch: Callable[[list[str]], int] = load_main_from(app / "Content" / "launch.py")
-    loaded[name] = TayangApp(name, desc, launch, str(app))
-  
+  for app in discover_Tayang_applications(dirs):
+    launch: Callable[[list[str]], int] = lazy_main(Path(app["path"]) / "Content" / "launch.py")
+    loaded[app["name"]] = TayangApp(app["name"], app["desc"], launch, app["path"])
+
   return loaded
-  
 
-def main():
-  if len(sys.argv) < 2:
-    sys.argv.append('')
-    sys.argv.append('')
 
+# ------------------------------------------------
+# Daemon
+# ------------------------------------------------
+DAEMON_SOCKET = Path(".ysdev") / "daemon.sock"
+DAEMON_LOG = Path(".ysdev") / "daemon.log"
+DAEMON_IDLE_TIMEOUT = 3600.0
+# Commands that always run in the calling process.
+# startup-bench measures ysdev itself, which a daemon would hide.
+IN_PROCESS_COMMANDS = {"daemon", "nuke", "startup-bench"}
+
+def code_stamp() -> list[int]:
+  """Modification times of ysdev.py and scripts/*.py: the code a daemon must not outlive."""
+  stamp: list[int] = []
+  for path in [Path(__file__), *sorted(Path(__file__).parent.glob("scripts/*.py"))]:
+    try: stamp.append(path.stat().st_mtime_ns)
+    except OSError: stamp.append(0)
+  return stamp
+
+def read_Tayang_config() -> list[str]:
+  """Tayang search directories: the defaults plus the ones listed in .ys-tayang."""
   tayang_search_directories: list[str] = ['scripts/', 'devs/']
 
   try:
@@ -410,17 +801,258 @@ def main():
     with open(".ys-tayang", "w") as tayang_cfg:
       tayang_cfg.write('# tayang!')
       tayang_cfg.close()
+  return tayang_search_directories
 
-  applications = load_Tayang_applications(tayang_search_directories)
-
-  cmd = sys.argv[1].strip()
+def dispatch(applications: dict[str, TayangApp], argv: list[str]) -> int | None:
+  cmd = argv[1].strip()
   app = applications.get(cmd)
   if app:
-    return app.launch(sys.argv[2:])
+    return app.launch(argv[2:])
   else:
     print(f"Found applications: ({len(applications)} application packages)\n")
     for _, tayang in applications.items(): print(f'\t{tayang.help()}')
 
+class DaemonApps:
+  """Tayang apps kept imported by the daemon; an app is reloaded when its launch.py changes."""
+  def __init__(self) -> None:
+    self.applications: dict[str, TayangApp] = {}
+    self.loaded: dict[str, tuple[int | None, Callable[[list[str]], int] | None]] = {}
+
+  def refresh(self) -> None:
+    applications = load_Tayang_applications(read_Tayang_config())
+    for name, app in applications.items():
+      if app.source == "built-in":
+        continue
+      launch_py = str(Path(app.source) / "Content" / "launch.py")
+      mtime = mtime_ns(launch_py)
+      cached = self.loaded.get(launch_py)
+      if cached is None or cached[0] != mtime:
+        try:
+          cached = (mtime, load_main_from(Path(launch_py)))
+          print(f"{ME}: loaded {name} from {launch_py}", flush=True)
+        except Exception as e:
+          # Left lazy: the error is reported to the client that launches it.
+          cached = (mtime, None)
+          print(f"{ME}: could not load {launch_py}: {e}", flush=True)
+        self.loaded[launch_py] = cached
+      if cached[1] is not None:
+        app.invocable = cached[1]
+    self.applications = applications
+
+def recv_request(conn) -> tuple[dict, list[int]]:
+  """Read one newline-terminated JSON request and the file descriptors sent with it."""
+  import json
+  import socket
+  data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+  while data and not data.endswith(b"\n"):
+    chunk = conn.recv(65536)
+    if not chunk: break
+    data += chunk
+  return (json.loads(data) if data.strip() else {}), fds
+
+def serve_request(conn, request: dict, fds: list[int], daemon: DaemonApps) -> None:
+  """Run one command in a forked child that writes straight to the client's stdio."""
+  import json
+  import threading
+  signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+  for target, fd in enumerate(fds):
+    os.dup2(fd, target)
+    os.close(fd)
+  sys.stdin = os.fdopen(0, "r", closefd=False)
+  sys.stdout = os.fdopen(1, "w", buffering=1, closefd=False)
+  sys.stderr = os.fdopen(2, "w", buffering=1, closefd=False)
+  os.chdir(request["cwd"])
+  os.environ.clear()
+  os.environ.update(request["env"])
+  sys.argv = request["argv"]
+
+  def watch_client() -> None:
+    # The client closing the connection (e.g. on Ctrl-C) interrupts the command.
+    if not conn.recv(1):
+      os.kill(os.getpid(), signal.SIGINT)
+  threading.Thread(target=watch_client, daemon=True).start()
+
+  code: int = 1
+  try:
+    code = dispatch(daemon.applications, sys.argv) or 0
+  except SystemExit as e:
+    code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+  except KeyboardInterrupt:
+    print(f'{ME}: KeyboardInterrupt.')
+    code = 0
+  except BaseException:
+    import traceback
+    traceback.print_exc()
+  finally:
+    # The client closes the connection once it has the reply: that is not an interrupt anymore.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try: conn.sendall(json.dumps({"code": code}).encode() + b"\n")
+    except OSError: pass
+    os._exit(0)
+
+def serve_daemon() -> int:
+  """Listen on .ysdev/daemon.sock and fork a warm child per command."""
+  import json
+  import socket
+  DAEMON_SOCKET.parent.mkdir(exist_ok=True)
+  DAEMON_SOCKET.unlink(missing_ok=True)
+  server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  server.bind(str(DAEMON_SOCKET))
+  os.chmod(DAEMON_SOCKET, 0o600)
+  server.listen(16)
+  server.settimeout(DAEMON_IDLE_TIMEOUT)
+  # Children report their own exit code to the client; let the kernel reap them.
+  signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+  signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+  daemon = DaemonApps()
+  daemon.refresh()
+  stamp = code_stamp()
+  print(f"{ME}: daemon {os.getpid()} listening on {DAEMON_SOCKET}", flush=True)
+  try:
+    while True:
+      try:
+        conn, _ = server.accept()
+      except socket.timeout:
+        print(f"{ME}: idle for {DAEMON_IDLE_TIMEOUT:g}s, exiting", flush=True)
+        return 0
+      with conn:
+        try:
+          request, fds = recv_request(conn)
+        except (OSError, ValueError):
+          continue
+        control = request.get("control")
+        if control is not None:
+          conn.sendall(json.dumps({"pid": os.getpid(), "apps": len(daemon.applications)}).encode() + b"\n")
+          if control == "stop":
+            return 0
+          continue
+        if code_stamp() != stamp:
+          # ysdev.py or scripts/ changed (edit, pull): let the client run the new code itself.
+          conn.sendall(json.dumps({"stale": True}).encode() + b"\n")
+          print(f"{ME}: ysdev code changed, exiting", flush=True)
+          return 0
+        daemon.refresh()
+        if os.fork() == 0:
+          # The child must never return into this loop (or its cleanup).
+          try:
+            server.close()
+            serve_request(conn, request, fds, daemon)
+          finally:
+            os._exit(1)
+        for fd in fds:
+          os.close(fd)
+  finally:
+    server.close()
+    DAEMON_SOCKET.unlink(missing_ok=True)
+
+def daemon_call(message: dict, fds: list[int] | None = None) -> dict | None:
+  """Send one request to the daemon and wait for its reply; None when no daemon answers."""
+  import json
+  import socket
+  if not hasattr(socket, "AF_UNIX") or not DAEMON_SOCKET.exists():
+    return None
+  client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  with client:
+    try:
+      client.connect(str(DAEMON_SOCKET))
+      socket.send_fds(client, [json.dumps(message).encode() + b"\n"], fds or [])
+    except OSError:
+      return None
+    data = b""
+    while not data.endswith(b"\n"):
+      chunk = client.recv(4096)
+      if not chunk: break
+      data += chunk
+  return json.loads(data) if data else {}
+
+def run_in_daemon(argv: list[str]) -> int | None:
+  """Forward argv to a running daemon, or return None to run in-process."""
+  if os.environ.get("YSDEV_NO_DAEMON") or argv[1].strip() in IN_PROCESS_COMMANDS:
+    return None
+  sys.stdout.flush()
+  sys.stderr.flush()
+  try:
+    reply = daemon_call({"argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}, [0, 1, 2])
+  except KeyboardInterrupt:
+    return 0
+  if reply is None or reply.get("stale"):
+    return None
+  if "code" not in reply:
+    print(f"{Ansi.BRIGHT_RED}{ME}: the daemon exited before the command finished{Ansi.RESET}")
+    return 1
+  return reply["code"]
+
+def cmd_daemon(args: list[str]) -> int:
+  """
+  ysdev daemon start|stop|status|serve
+  Keeps Tayang apps imported in a background process; later ysdev.py calls in
+  this directory are forwarded to it (set YSDEV_NO_DAEMON=1 to bypass it).
+  """
+  action = args[0] if args and args[0] else "status"
+  if action == "serve":
+    return serve_daemon()
+  if action == "status":
+    reply = daemon_call({"control": "status"})
+    if reply is None:
+      print(f"{ME}: no daemon running")
+      return 1
+    print(f"{ME}: daemon {reply['pid']} running on {DAEMON_SOCKET} ({reply['apps']} applications)")
+    return 0
+  if action == "stop":
+    if daemon_call({"control": "stop"}) is None:
+      print(f"{ME}: no daemon running")
+      return 1
+    print(f"{ME}: daemon stopped")
+    return 0
+  if action == "start":
+    if daemon_call({"control": "status"}) is not None:
+      print(f"{ME}: daemon already running")
+      return 0
+    DAEMON_SOCKET.parent.mkdir(exist_ok=True)
+    with open(DAEMON_LOG, "a") as log:
+      subprocess.Popen([sys.executable, str(Path(__file__).resolve()), "daemon", "serve"],
+                       stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, start_new_session=True)
+    for _ in range(100):
+      time.sleep(0.05)
+      if daemon_call({"control": "status"}) is not None:
+        print(f"{ME}: daemon started on {DAEMON_SOCKET}")
+        return 0
+    print(f"{Ansi.BRIGHT_RED}{ME}: daemon did not start, see {DAEMON_LOG}{Ansi.RESET}")
+    return 1
+  print(f"{Ansi.BRIGHT_RED}{ME}: usage: daemon start|stop|status{Ansi.RESET}")
+  return 1
+
+def main():
+  if '--profile-startup' in sys.argv:
+    sys.argv.remove('--profile-startup')
+    STARTUP.enable()
+  STARTUP.mark("ysdev")
+
+  if len(sys.argv) < 2:
+    sys.argv.append('')
+    sys.argv.append('')
+
+  if not STARTUP.enabled:
+    code = run_in_daemon(sys.argv)
+    if code is not None:
+      return code
+
+  tayang_search_directories = read_Tayang_config()
+  STARTUP.mark("config")
+
+  applications = load_Tayang_applications(tayang_search_directories)
+  STARTUP.mark("discovery")
+
+  try:
+    return dispatch(applications, sys.argv)
+  finally:
+    if STARTUP.enabled:
+      STARTUP.mark("launch")
+      print(STARTUP.report(), file=sys.stderr)
+
 if __name__ == "__main__":
   try:
     sys.exit(main())